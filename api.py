@@ -1,17 +1,61 @@
 #!/usr/bin/env python3
 import os
 import json
+import random
 import asyncio
+import threading
 from datetime import datetime
+from typing import Optional
+
 import aiohttp
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from functools import lru_cache
+
+try:
+    import orjson  # optional: 2-5x faster serialization, emits bytes directly
+except ImportError:
+    orjson = None
+
+try:
+    import httpx  # optional: HTTP/2 multiplexes many small POSTs on one connection
+    import h2  # noqa: F401 — AsyncClient(http2=True) raises without the 'h2' extra
+except ImportError:
+    httpx = None
+
+# Transport errors worth retrying (timeouts / connection problems)
+_RETRYABLE_EXC = (asyncio.TimeoutError, aiohttp.ClientConnectionError)
+if httpx is not None:
+    _RETRYABLE_EXC = _RETRYABLE_EXC + (httpx.TransportError,)
+
 from db import SessionDatabase
 from logger import setup_logger
 
 logger = setup_logger('api')
 
 
+@lru_cache(maxsize=4096)
+def _format_ts_for_api(ts: str) -> str:
+    """Truncate an ISO timestamp to minute resolution for the API.
+
+    Timestamps repeat heavily across payloads (shared started_at values,
+    minute-aligned boundaries), so results are memoized.
+    """
+    # Fast path: naive "YYYY-MM-DDTHH:MM:SS[.ffffff]" needs only a slice —
+    # no datetime round-trip. Anything timezone-suffixed falls through.
+    if (len(ts) >= 17 and ts[4] == '-' and ts[7] == '-'
+            and ts[10] == 'T' and ts[13] == ':' and ts[16] == ':'):
+        rest = ts[17:]
+        if 'Z' not in rest and '+' not in rest and '-' not in rest:
+            return ts[:16] + ':00'
+    try:
+        dt = datetime.fromisoformat(ts)
+        dt = dt.replace(second=0, microsecond=0)
+        return dt.isoformat()
+    except Exception:
+        return ts
+
+
 class SessionAPIManager(QObject):
     status_changed = pyqtSignal(str)
 
@@ -41,6 +85,86 @@ class SessionAPIManager(QObject):
 
         self.db = SessionDatabase()
 
+        # Shared HTTP session (created lazily, reused for all POSTs in a sync)
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._httpx = None  # httpx.AsyncClient when httpx is installed
+        # Single-flight guard so rapid repeated triggers can't run two syncs
+        # that would race on the same unsynced rows
+        self._sync_lock = threading.Lock()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared ClientSession, creating it lazily.
+
+        Reusing one session keeps connections alive between POSTs instead of
+        paying a TCP+TLS handshake per payload.
+        """
+        if self._http is None or self._http.closed:
+            # Small set of n8n hosts: long keepalive + DNS caching so POSTs
+            # after idle periods skip the TCP+TLS setup that dominates
+            # small-payload latency
+            connector = aiohttp.TCPConnector(
+                limit=32,
+                limit_per_host=8,
+                keepalive_timeout=300,
+                enable_cleanup_closed=True,
+                use_dns_cache=True,
+                ttl_dns_cache=600,
+            )
+            self._http = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=10, connect=3)
+            )
+        return self._http
+
+    def _get_httpx_client(self) -> 'httpx.AsyncClient':
+        """Return the shared httpx client (HTTP/2), creating it lazily."""
+        if self._httpx is None or self._httpx.is_closed:
+            self._httpx = httpx.AsyncClient(
+                http2=True,
+                timeout=10.0,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            )
+        return self._httpx
+
+    async def aclose(self):
+        """Close the shared HTTP client(s) if any were created."""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+        if self._httpx is not None and not self._httpx.is_closed:
+            await self._httpx.aclose()
+        self._httpx = None
+
+    async def _post_once(self, url: str, payload: dict):
+        """Send one POST; returns (status, retry_after). Raises on transport errors.
+
+        Prefers the HTTP/2 client when httpx is installed so many small POSTs
+        multiplex onto a single TCP+TLS connection; falls back to the pooled
+        aiohttp session otherwise.
+        """
+        if httpx is not None:
+            client = self._get_httpx_client()
+            if orjson is not None:
+                resp = await client.post(url, content=orjson.dumps(payload),
+                                         headers={'Content-Type': 'application/json'})
+            else:
+                resp = await client.post(url, json=payload)
+            return resp.status_code, resp.headers.get('Retry-After')
+        session = await self._get_session()
+        if orjson is not None:
+            kwargs = {'data': orjson.dumps(payload),
+                      'headers': {'Content-Type': 'application/json'}}
+        else:
+            kwargs = {'json': payload}
+        async with session.post(url, **kwargs) as resp:
+            status = resp.status
+            retry_after = resp.headers.get('Retry-After')
+            # We never read the body; release the connection back to the pool
+            # explicitly so keep-alive reuse doesn't wait on GC (unread bodies
+            # can pin connections and leak FDs)
+            await resp.release()
+        return status, retry_after
+
     async def make_request(self, subcommand, params=None, session_id=None):
         # Placeholder: local event log + status only. No network.
         if session_id:
@@ -49,93 +173,62 @@ class SessionAPIManager(QObject):
         return True
 
     def run_async(self, coro):
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop.run_until_complete(coro)
+        # asyncio.run manages the loop lifecycle (get_event_loop is deprecated
+        # and could resurrect a closed loop, leaking sockets)
+        return asyncio.run(coro)
 
-    @staticmethod
-    def _format_ts_for_api(ts: str) -> str:
-        try:
-            dt = datetime.fromisoformat(ts)
-            dt = dt.replace(second=0, microsecond=0)
-            return dt.isoformat()
-        except Exception:
-            return ts
+    def trigger_sync(self):
+        """Start a sync unless one is already in flight.
+
+        Coalesces duplicate triggers (e.g. double-clicking "Sync Now") so two
+        syncs can't fetch the same unsynced rows, post duplicates and race on
+        the deletes. The sync loop runs on a worker thread so the GUI thread
+        never blocks on network I/O; status_changed emissions are delivered
+        back to it as queued connections.
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            logger.info("Sync already in progress, ignoring duplicate trigger")
+            return False
+
+        def _run():
+            try:
+                self.run_async(self.sync_unsynced())
+            except Exception:
+                logger.exception("Sync failed")
+            finally:
+                self._sync_lock.release()
+
+        threading.Thread(target=_run, name="n8n-sync", daemon=True).start()
+        return True
 
     async def sync_unsynced(self):
         # Prepare and send payloads to configured endpoints; only manual trigger uses this.
+        # If endpoints are not configured, keep local only — bail before doing
+        # any DB reads or payload prep.
+        if not (self.session_log_endpoint and self.session_pauses_endpoint):
+            self.status_changed.emit("⚠️ Sync skipped (endpoints not configured)")
+            return False
+
         logger.info("Reading database for unsynced sessions...")
-        sessions = self.db.fetch_unsynced_sessions()
+        # Run blocking file I/O in a worker thread so it doesn't stall the loop
+        sessions = await asyncio.to_thread(self.db.fetch_unsynced_sessions)
         if not sessions:
             self.status_changed.emit("✅ Nothing to sync")
             return True
 
-        logger.info(f"Found {len(sessions)} unsynced session(s)")
-        prepared = []
-        for s in sessions:
-            session_payload = {
-                'session_id': s['session_id'],
-                'started_at': self._format_ts_for_api(s['started_at']) if s.get('started_at') else None,
-                'ended_at': self._format_ts_for_api(s['ended_at']) if s.get('ended_at') else None,
-                'total_duration_seconds': s.get('total_duration_seconds') or 0,
-                'pause_count': s.get('pause_count') or 0,
-                'total_pause_duration_seconds': s.get('total_pause_duration_seconds') or 0,
-                'notes': s.get('notes') or '',
-                'location': s.get('location') or '',
-                'equipment': s.get('equipment') or ''
-            }
-            pauses = self.db.fetch_unsynced_pauses_for_session(s['session_id'])
-            pause_payloads = [
-                {
-                    'id': p['id'],
-                    'session_id': p['session_id'],
-                    'reason': p.get('reason') or '',
-                    'started_at': self._format_ts_for_api(p['started_at']) if p.get('started_at') else None,
-                    'ended_at': self._format_ts_for_api(p['ended_at']) if p.get('ended_at') else None,
-                    'duration_seconds': p.get('duration_seconds') or 0,
-                }
-                for p in pauses
-            ]
-            logger.debug(f"Session {s['session_id']}: {len(pause_payloads)} pause(s)")
-            prepared.append({'session': session_payload, 'pauses': pause_payloads})
-        # If endpoints are not configured, keep local only.
-        if not (self.session_log_endpoint and self.session_pauses_endpoint):
-            self.status_changed.emit("⚠️ Sync skipped (endpoints not configured)")
-            return False
+        logger.info("Found %d unsynced session(s)", len(sessions))
+        # One grouped read instead of one pause lookup per session (N+1)
+        pauses_by_sid = await asyncio.to_thread(
+            self.db.fetch_unsynced_pauses_for_sessions,
+            [s.session_id for s in sessions])
 
-        # Perform network calls; delete only upon success (2XX)
+        # Perform network calls; flag rows synced only upon success (2XX)
         # Continue all attempts even on 4XX or errors
-        all_ok = True
-        for item in prepared:
-            s = item['session']
-            logger.info(f"Syncing session {s['session_id']}...")
-            ok = await self._post_json(self.session_log_endpoint, s)
-            if not ok:
-                all_ok = False
-                self.status_changed.emit(f"⚠️ session-log failed for {s['session_id']}")
-                logger.warning(f"Session log sync failed for {s['session_id']}")
-                # Continue to attempt pause sends even if session-log failed
-            sent_pause_ids = []
-            for p in item['pauses']:
-                pok = await self._post_json(self.session_pauses_endpoint, p)
-                if pok:
-                    sent_pause_ids.append(p['id'])
-                else:
-                    all_ok = False
-                    self.status_changed.emit(f"⚠️ session-pauses failed for pause {p['id']}")
-                    logger.warning(f"Pause sync failed for pause {p['id']}")
-                    # Continue to next pause even on failure
-            if sent_pause_ids:
-                logger.debug(f"Deleting {len(sent_pause_ids)} synced pause(s)")
-                self.db.delete_pauses_by_ids(sent_pause_ids)
-            if len(sent_pause_ids) == len(item['pauses']):
-                logger.info(f"All pauses synced for session {s['session_id']}, deleting from local storage")
-                self.db.delete_session_by_session_id(s['session_id'])
-            else:
-                logger.info(f"Not all pauses synced for session {s['session_id']}, keeping locally")
+        try:
+            all_ok = await self._pipeline_sync(sessions, pauses_by_sid)
+        finally:
+            # Release pooled connections once the whole sync is done
+            await self.aclose()
 
         if all_ok:
             self.status_changed.emit("✅ Sync completed")
@@ -143,21 +236,144 @@ class SessionAPIManager(QObject):
             self.status_changed.emit("⚠️ Sync partially completed")
         return all_ok
 
-    async def _post_json(self, url: str, payload: dict):
-        if not url:
-            return False
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    ok = 200 <= resp.status < 300
-                    if ok:
-                        logger.debug(f"POST {url} -> {resp.status}")
+    @staticmethod
+    def _build_item(s, pauses):
+        """Build one session's payloads for the sync endpoints.
+
+        Rows arrive as the namedtuples SessionDatabase returns, so fields
+        are plain attribute reads.
+        """
+        started = s.started_at
+        ended = s.ended_at
+        session_payload = {
+            'session_id': s.session_id,
+            'started_at': _format_ts_for_api(started) if started else None,
+            'ended_at': _format_ts_for_api(ended) if ended else None,
+            'total_duration_seconds': s.total_duration_seconds or 0,
+            'pause_count': s.pause_count or 0,
+            'total_pause_duration_seconds': s.total_pause_duration_seconds or 0,
+            'notes': s.notes or '',
+            'location': s.location or '',
+            'equipment': s.equipment or ''
+        }
+        pause_payloads = []
+        for p in pauses:
+            p_started = p.started_at
+            p_ended = p.ended_at
+            pause_payloads.append({
+                'id': p.id,
+                'session_id': p.session_id,
+                'reason': p.reason or '',
+                'started_at': _format_ts_for_api(p_started) if p_started else None,
+                'ended_at': _format_ts_for_api(p_ended) if p_ended else None,
+                'duration_seconds': p.duration_seconds or 0,
+            })
+        return {'session': session_payload, 'pauses': pause_payloads}
+
+    async def _sync_item(self, item):
+        """POST one prepared item. Returns (session_ok, sent_pause_ids)."""
+        sid = item['session']['session_id']
+        logger.info("Syncing session %s...", sid)
+        session_ok = await self._post_json(self.session_log_endpoint, item['session'])
+        if not session_ok:
+            self.status_changed.emit(f"⚠️ session-log failed for {sid}")
+            logger.warning("Session log sync failed for %s", sid)
+        sent_pause_ids = []
+        if item['pauses']:
+            # One POST carrying all of the session's pauses instead of one
+            # round-trip per pause
+            batch = {'session_id': sid, 'pauses': item['pauses']}
+            if await self._post_json(self.session_pauses_endpoint, batch):
+                sent_pause_ids = [p['id'] for p in item['pauses']]
+            else:
+                # Fallback: retry pause-by-pause so a single bad pause doesn't
+                # block the rest (preserves partial-success semantics)
+                logger.warning("Pause batch failed for session %s, retrying per-pause", sid)
+                for p in item['pauses']:
+                    if await self._post_json(self.session_pauses_endpoint, p):
+                        sent_pause_ids.append(p['id'])
                     else:
-                        logger.warning(f"POST {url} -> {resp.status}")
-                    return ok
-        except asyncio.TimeoutError:
-            logger.error(f"POST {url} -> timeout")
-            return False
-        except Exception as e:
-            logger.error(f"POST {url} -> error: {e}")
+                        self.status_changed.emit(f"⚠️ session-pauses failed for pause {p['id']}")
+                        logger.warning("Pause sync failed for pause %s", p['id'])
+        return session_ok, sent_pause_ids
+
+    async def _pipeline_sync(self, sessions, pauses_by_sid, consumers: int = 8):
+        """Producer/consumer pipeline: build payloads while POSTs are in flight.
+
+        A bounded queue overlaps payload prep with network I/O and caps peak
+        memory to queue.maxsize prepared items instead of the whole backlog.
+        """
+        queue = asyncio.Queue(maxsize=32)
+        all_ok = True
+        all_sent_pauses = []
+        all_done_sessions = []
+
+        async def producer():
+            for s in sessions:
+                sid = s.session_id
+                item = self._build_item(s, pauses_by_sid.get(sid, []))
+                logger.debug("Session %s: %d pause(s)", sid, len(item['pauses']))
+                await queue.put(item)
+            for _ in range(consumers):
+                await queue.put(None)
+
+        async def consumer():
+            nonlocal all_ok
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                sid = item['session']['session_id']
+                session_ok, sent_pause_ids = await self._sync_item(item)
+                if not session_ok:
+                    all_ok = False
+                all_sent_pauses.extend(sent_pause_ids)
+                if len(sent_pause_ids) == len(item['pauses']):
+                    all_done_sessions.append(sid)
+                else:
+                    all_ok = False
+                    logger.info("Not all pauses synced for session %s, keeping locally", sid)
+
+        await asyncio.gather(producer(), *[consumer() for _ in range(consumers)])
+
+        # Flip the synced flags once at the end, not per session; rows stay
+        # in SQLite (for stats and the CSV export) and the partial unsynced
+        # indexes keep future fetches as cheap as deletes did
+        if all_sent_pauses:
+            logger.debug("Marking %d pause(s) synced", len(all_sent_pauses))
+            await asyncio.to_thread(self.db.mark_pauses_synced, all_sent_pauses)
+        if all_done_sessions:
+            logger.info("Marking %d session(s) synced", len(all_done_sessions))
+            await asyncio.to_thread(self.db.mark_sessions_synced, all_done_sessions)
+        return all_ok
+
+    async def _post_json(self, url: str, payload: dict, max_tries: int = 3):
+        if not url:
             return False
+        for attempt in range(max_tries):
+            retry_after = None
+            try:
+                status, retry_after = await self._post_once(url, payload)
+                if 200 <= status < 300:
+                    logger.debug("POST %s -> %s", url, status)
+                    return True
+                if status < 500:
+                    # Client errors won't get better on retry
+                    logger.warning(f"POST {url} -> {status}")
+                    return False
+                logger.warning(f"POST {url} -> {status} (attempt {attempt + 1}/{max_tries})")
+            except _RETRYABLE_EXC as e:
+                logger.error(f"POST {url} -> {e or 'timeout'} (attempt {attempt + 1}/{max_tries})")
+            except Exception as e:
+                logger.error(f"POST {url} -> error: {e}")
+                return False
+            if attempt + 1 < max_tries:
+                # Exponential backoff with jitter; honor Retry-After if sent
+                delay = min(2 ** attempt, 8) + random.random() * 0.3
+                if retry_after:
+                    try:
+                        delay = max(delay, float(retry_after))
+                    except ValueError:
+                        pass
+                await asyncio.sleep(delay)
+        return False
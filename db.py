@@ -1,84 +1,370 @@
 #!/usr/bin/env python3
+import atexit
 import csv
+from contextlib import contextmanager
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 from models import StudySession
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Bump when the schema below changes so init_db reruns its DDL block
+_SCHEMA_VERSION = 4
+
+# Splits legacy comma-separated equipment strings, eating the
+# surrounding whitespace so tokens need no per-item strip()
+_SEP = re.compile(r'\s*,\s*')
+
+
+def _equipment_list(value):
+    """Decode a profiles.equipment cell into a list of item names.
+
+    Stored as a JSON array since schema v4; legacy rows held
+    comma-separated strings."""
+    if not value:
+        return []
+    if value.startswith('['):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return [s for s in _SEP.split(value.strip()) if s]
+
+SESSION_FIELDS = (
+    'session_id', 'started_at', 'ended_at', 'total_duration_seconds',
+    'active_time_seconds', 'pause_count', 'total_pause_duration_seconds', 'notes',
+    'location', 'equipment'
+)
+
+# Row types for bulk reads: one C-level tuple copy per row instead of
+# building a dict per row; fields mirror the table column order
+SessionRow = namedtuple('SessionRow', SESSION_FIELDS + ('synced_to_n8n',))
+PauseRow = namedtuple('PauseRow', (
+    'id', 'session_id', 'reason', 'started_at', 'ended_at', 'duration_seconds',
+    'synced_to_n8n'
+))
+
+# Hot-path SQL as shared constants: identical string objects let
+# pysqlite's per-connection statement cache reuse prepared statements
+_SQL_INSERT_SESSION = (
+    "INSERT OR REPLACE INTO sessions(session_id, started_at, ended_at,"
+    " total_duration_seconds, active_time_seconds, pause_count,"
+    " total_pause_duration_seconds, notes, location, equipment)"
+    " VALUES (?,?,?,?,?,?,?,?,?,?)"
+)
+_SQL_INSERT_PAUSE = (
+    "INSERT OR REPLACE INTO pauses(id, session_id, reason, started_at,"
+    " ended_at, duration_seconds) VALUES (?,?,?,?,?,?)"
+)
+_SQL_INSERT_EVENT = (
+    "INSERT INTO session_events(session_id, event_type, event_data, created_at_ms)"
+    " VALUES (?,?,?,?)"
+)
+_SQL_FETCH_UNSYNCED_SESSIONS = "SELECT * FROM sessions WHERE synced_to_n8n = 0"
+_SQL_FETCH_UNSYNCED_PAUSES = (
+    "SELECT * FROM pauses WHERE session_id = ? AND synced_to_n8n = 0"
+)
 
-class SessionDatabase:
-    """CSV-based session storage. All data persisted to sessions.csv and pauses.csv."""
-
-    def __init__(self, csv_path: Optional[Path] = None):
-        if csv_path is None:
-            csv_path = Path.home() / '.local/share/study-session' / 'sessions.csv'
-        self.csv_path = csv_path
-        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
-        self.pauses_csv = self.csv_path.parent / 'pauses.csv'
-        # Catalogs and profiles
-        self.location_catalog_csv = self.csv_path.parent / 'location_catalog.csv'
-        self.equipment_catalog_csv = self.csv_path.parent / 'equipment_catalog.csv'
-        self.profiles_csv = self.csv_path.parent / 'profiles.csv'
-        self.settings_csv = self.csv_path.parent / 'settings.csv'
-        self.ensure_csv_headers()
-
-    def ensure_csv_headers(self):
-        """Ensure CSV files have headers; migrate old headers to include new columns."""
-        session_fields = [
-            'session_id', 'started_at', 'ended_at', 'total_duration_seconds',
-            'active_time_seconds', 'pause_count', 'total_pause_duration_seconds', 'notes',
-            'location', 'equipment'
-        ]
-        # Create or migrate sessions.csv
-        if not self.csv_path.exists() or self.csv_path.stat().st_size == 0:
-            with self.csv_path.open(mode='w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=session_fields)
-                writer.writeheader()
-        else:
-            # Migrate existing file if missing new columns
-            with self.csv_path.open(mode='r', newline='') as f:
-                reader = csv.DictReader(f)
-                existing_fields = reader.fieldnames or []
-                needs_migration = any(col not in existing_fields for col in ['location', 'equipment'])
-                if needs_migration:
-                    rows = list(reader)
-            if 'needs_migration' in locals() and needs_migration:
-                # Re-write with new headers; fill missing fields with ''
-                with self.csv_path.open(mode='w', newline='') as fw:
-                    writer = csv.DictWriter(fw, fieldnames=session_fields)
-                    writer.writeheader()
-                    for row in rows:
-                        row = row or {}
-                        for col in session_fields:
-                            if col not in row:
-                                row[col] = ''
-                        writer.writerow(row)
-
-        if not self.pauses_csv.exists() or self.pauses_csv.stat().st_size == 0:
-            with self.pauses_csv.open(mode='w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=[
-                    'id', 'session_id', 'reason', 'started_at', 'ended_at', 'duration_seconds'
-                ])
-                writer.writeheader()
-
-        # Initialize catalogs and profiles if missing
-        if not self.location_catalog_csv.exists() or self.location_catalog_csv.stat().st_size == 0:
-            with self.location_catalog_csv.open(mode='w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['location'])
-                writer.writeheader()
-                for loc in ['home', 'class', 'transports']:
-                    writer.writerow({'location': loc})
-        if not self.equipment_catalog_csv.exists() or self.equipment_catalog_csv.stat().st_size == 0:
-            with self.equipment_catalog_csv.open(mode='w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['equipment'])
-                writer.writeheader()
-        if not self.profiles_csv.exists() or self.profiles_csv.stat().st_size == 0:
-            with self.profiles_csv.open(mode='w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['name', 'location', 'equipment'])
-                writer.writeheader()
 
-    def save_session(self, session: StudySession, notes: str = "", location: str = "", equipment: str = ""):
-        """Save a session to CSV (sessions.csv) and log its pauses (pauses.csv)."""
+class SessionDatabase:
+    """SQLite-backed session storage.
+
+    Sessions, pauses, catalogs, profiles and settings live in a single
+    sessions.db file with indexed tables, so lookups are B-tree probes
+    instead of full CSV scans. Completed sessions are additionally appended
+    to sessions.csv as a human-readable export (the format documented in the
+    README); legacy CSV data is migrated into SQLite on first start.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        if db_path is None:
+            db_path = Path.home() / '.local/share/study-session' / 'sessions.db'
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        data_dir = self.db_path.parent
+        # Human-readable export of completed sessions
+        self.sessions_export_csv = data_dir / 'sessions.csv'
+        # Legacy CSV files (read once for migration)
+        self.legacy_sessions_csv = data_dir / 'sessions.csv'
+        self.legacy_pauses_csv = data_dir / 'pauses.csv'
+        self.legacy_location_catalog_csv = data_dir / 'location_catalog.csv'
+        self.legacy_equipment_catalog_csv = data_dir / 'equipment_catalog.csv'
+        self.legacy_profiles_csv = data_dir / 'profiles.csv'
+        self.legacy_settings_csv = data_dir / 'settings.csv'
+        # Persistent append handle for the CSV export (opened on first use)
+        self._export_fp = None
+        self._export_writer = None
+        # Settings cache, loaded on first get_setting and kept write-through
+        self._settings_cache = None
+        # Buffered session events, flushed in one transaction
+        self._event_buf = []
+        # One cached connection; the lock serializes Qt-timer and sync-thread
+        # callers so we never pay connect+PRAGMA setup per operation
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        # Reused cursor for the event-log fast path
+        self._event_cursor = self._conn.cursor()
+        atexit.register(self.close)
+        self.init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Autocommit: pysqlite's implicit transaction management wraps even
+        # lone INSERTs in BEGIN/COMMIT pairs. With it off, a single-statement
+        # write is one WAL frame, and multi-statement batches go through
+        # _transaction_locked's explicit BEGIN IMMEDIATE.
+        conn.isolation_level = None
+        # WAL keeps readers and the writer concurrent and cuts fsyncs;
+        # NORMAL syncs only at checkpoints, which WAL makes safe enough here.
+        # WAL persists in the DB file but is reapplied defensively.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        # Checkpoint roughly every 1000 pages so the WAL file stays small
+        # without stalling individual log_event commits
+        conn.execute("PRAGMA wal_autocheckpoint=1000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-16000")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @contextmanager
+    def _transaction_locked(self):
+        """BEGIN IMMEDIATE ... COMMIT around the yielded connection.
+
+        Caller must hold self._lock. Taking the write lock up front means
+        everything inside lands atomically in one commit (one fsync)."""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    @contextmanager
+    def transaction(self):
+        """Public transaction scope for callers batching several writes."""
+        with self._lock:
+            with self._transaction_locked() as conn:
+                yield conn
+
+    def init_db(self):
+        """Create tables and indexes if missing; migrate legacy CSV data once."""
+        with self._lock:
+            conn = self._conn
+            # Databases already at the current schema skip the whole DDL
+            # and migration block with a single pragma read
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= _SCHEMA_VERSION:
+                return
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    started_at TEXT,
+                    ended_at TEXT,
+                    total_duration_seconds INTEGER DEFAULT 0,
+                    active_time_seconds INTEGER DEFAULT 0,
+                    pause_count INTEGER DEFAULT 0,
+                    total_pause_duration_seconds INTEGER DEFAULT 0,
+                    notes TEXT DEFAULT '',
+                    location TEXT DEFAULT '',
+                    equipment TEXT DEFAULT '',
+                    synced_to_n8n INTEGER DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS pauses (
+                    id TEXT PRIMARY KEY,
+                    session_id TEXT,
+                    reason TEXT DEFAULT '',
+                    started_at TEXT,
+                    ended_at TEXT,
+                    duration_seconds INTEGER DEFAULT 0,
+                    synced_to_n8n INTEGER DEFAULT 0
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_pauses_session_id ON pauses(session_id);
+                CREATE INDEX IF NOT EXISTS idx_sessions_unsynced
+                    ON sessions(synced_to_n8n, ended_at) WHERE synced_to_n8n = 0;
+                CREATE INDEX IF NOT EXISTS idx_pauses_unsynced
+                    ON pauses(session_id, synced_to_n8n) WHERE synced_to_n8n = 0;
+                CREATE TABLE IF NOT EXISTS location_catalog (
+                    location TEXT PRIMARY KEY
+                );
+                CREATE TABLE IF NOT EXISTS equipment_catalog (
+                    equipment TEXT PRIMARY KEY
+                );
+                CREATE TABLE IF NOT EXISTS profiles (
+                    name TEXT PRIMARY KEY,
+                    location TEXT DEFAULT '',
+                    equipment TEXT DEFAULT ''
+                );
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT DEFAULT ''
+                );
+                CREATE TABLE IF NOT EXISTS session_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT,
+                    event_type TEXT,
+                    event_data TEXT DEFAULT '',
+                    created_at_ms INTEGER
+                );
+            """)
+            conn.commit()
+            if 0 < version < 3:
+                # Older pauses tables keep a separate rowid B-tree next to
+                # the text PK index; rebuild as a single clustered index
+                sql = conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type='table'"
+                    " AND name='pauses'").fetchone()[0]
+                if 'WITHOUT ROWID' not in sql:
+                    conn.executescript("""
+                        ALTER TABLE pauses RENAME TO pauses_rowid;
+                        CREATE TABLE pauses (
+                            id TEXT PRIMARY KEY,
+                            session_id TEXT,
+                            reason TEXT DEFAULT '',
+                            started_at TEXT,
+                            ended_at TEXT,
+                            duration_seconds INTEGER DEFAULT 0,
+                            synced_to_n8n INTEGER DEFAULT 0
+                        ) WITHOUT ROWID;
+                        INSERT INTO pauses SELECT * FROM pauses_rowid;
+                        DROP TABLE pauses_rowid;
+                        CREATE INDEX IF NOT EXISTS idx_pauses_session_id
+                            ON pauses(session_id);
+                        CREATE INDEX IF NOT EXISTS idx_pauses_unsynced
+                            ON pauses(session_id, synced_to_n8n) WHERE synced_to_n8n = 0;
+                    """)
+                    conn.commit()
+            if version == 1:
+                # v1 stored ISO strings in session_events.created_at;
+                # rebuild the table around an epoch-ms INTEGER column
+                cols = [r[1] for r in conn.execute("PRAGMA table_info(session_events)")]
+                if 'created_at_ms' not in cols:
+                    conn.executescript("""
+                        ALTER TABLE session_events RENAME TO session_events_v1;
+                        CREATE TABLE session_events (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            session_id TEXT,
+                            event_type TEXT,
+                            event_data TEXT DEFAULT '',
+                            created_at_ms INTEGER
+                        );
+                        INSERT INTO session_events(id, session_id, event_type, event_data, created_at_ms)
+                            SELECT id, session_id, event_type, event_data,
+                                   CAST(strftime('%s', created_at) AS INTEGER) * 1000
+                            FROM session_events_v1;
+                        DROP TABLE session_events_v1;
+                    """)
+                    conn.commit()
+            # O(1) marker check so established databases skip the
+            # table-emptiness probes and CSV stats on every start
+            marker = conn.execute(
+                "SELECT value FROM settings WHERE key = 'legacy_csv_migrated'").fetchone()
+            if marker is None:
+                self._migrate_legacy_csv(conn)
+                # Seed default locations on a fresh database
+                count = conn.execute(
+                    "SELECT COUNT(*) FROM location_catalog").fetchone()[0]
+                if count == 0:
+                    for loc in ['home', 'class', 'transports']:
+                        conn.execute(
+                            "INSERT INTO location_catalog(location) VALUES (?)", (loc,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO settings(key, value)"
+                    " VALUES ('legacy_csv_migrated', '1')")
+                conn.commit()
+            if version < 4:
+                # v4 stores profiles.equipment as a JSON array instead of a
+                # comma-separated string; normalize rows written by older
+                # builds (and any just imported from profiles.csv)
+                rows = conn.execute(
+                    "SELECT name, equipment FROM profiles"
+                    " WHERE equipment != '' AND equipment NOT LIKE '[%'").fetchall()
+                if rows:
+                    conn.executemany(
+                        "UPDATE profiles SET equipment = ? WHERE name = ?",
+                        [(json.dumps(_equipment_list(row['equipment'])), row['name'])
+                         for row in rows])
+                    conn.commit()
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            conn.commit()
+
+    def _migrate_legacy_csv(self, conn: sqlite3.Connection):
+        """One-time import of the old CSV files into SQLite.
+
+        Only runs while the corresponding tables are empty, so re-running is
+        harmless. The CSV files are left in place: sessions.csv doubles as
+        the ongoing export, the others become inert.
+        """
+        def read_rows(path):
+            if not path.exists():
+                return []
+            with path.open(mode='r', newline='') as f:
+                return [row for row in csv.DictReader(f) if row]
+
+        if conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0:
+            for row in read_rows(self.legacy_sessions_csv):
+                conn.execute(
+                    "INSERT OR IGNORE INTO sessions(session_id, started_at, ended_at,"
+                    " total_duration_seconds, active_time_seconds, pause_count,"
+                    " total_pause_duration_seconds, notes, location, equipment)"
+                    " VALUES (?,?,?,?,?,?,?,?,?,?)",
+                    (row.get('session_id'), row.get('started_at'), row.get('ended_at'),
+                     row.get('total_duration_seconds') or 0, row.get('active_time_seconds') or 0,
+                     row.get('pause_count') or 0, row.get('total_pause_duration_seconds') or 0,
+                     row.get('notes') or '', row.get('location') or '', row.get('equipment') or ''))
+        if conn.execute("SELECT COUNT(*) FROM pauses").fetchone()[0] == 0:
+            for row in read_rows(self.legacy_pauses_csv):
+                conn.execute(
+                    "INSERT OR IGNORE INTO pauses(id, session_id, reason, started_at,"
+                    " ended_at, duration_seconds) VALUES (?,?,?,?,?,?)",
+                    (row.get('id'), row.get('session_id'), row.get('reason') or '',
+                     row.get('started_at'), row.get('ended_at'), row.get('duration_seconds') or 0))
+        if conn.execute("SELECT COUNT(*) FROM location_catalog").fetchone()[0] == 0:
+            for row in read_rows(self.legacy_location_catalog_csv):
+                if row.get('location'):
+                    conn.execute("INSERT OR IGNORE INTO location_catalog(location) VALUES (?)",
+                                 (row['location'],))
+        if conn.execute("SELECT COUNT(*) FROM equipment_catalog").fetchone()[0] == 0:
+            for row in read_rows(self.legacy_equipment_catalog_csv):
+                if row.get('equipment'):
+                    conn.execute("INSERT OR IGNORE INTO equipment_catalog(equipment) VALUES (?)",
+                                 (row['equipment'],))
+        if conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0] == 0:
+            for row in read_rows(self.legacy_profiles_csv):
+                if row.get('name'):
+                    conn.execute("INSERT OR IGNORE INTO profiles(name, location, equipment)"
+                                 " VALUES (?,?,?)",
+                                 (row['name'], row.get('location') or '', row.get('equipment') or ''))
+        if conn.execute("SELECT COUNT(*) FROM settings").fetchone()[0] == 0:
+            for row in read_rows(self.legacy_settings_csv):
+                if row.get('key'):
+                    conn.execute("INSERT OR IGNORE INTO settings(key, value) VALUES (?,?)",
+                                 (row['key'], row.get('value') or ''))
+        conn.commit()
+
+    def build_session_rows(self, session: StudySession, notes: str = "", location: str = "", equipment: str = ""):
+        """Snapshot a finished session into plain row data.
+
+        Runs on the caller's thread, so the session object may be reset or
+        reused immediately afterwards while a worker persists the rows.
+        Returns (session_row, pause_rows), or None when there is nothing
+        to save.
+        """
         summary = session.end()
         if not summary:
             if session.start_time and session.end_time and not session.is_running:
@@ -94,9 +380,8 @@ class SessionDatabase:
                     'pauses': session.pause_manager.get_session_pauses(session.id)
                 }
             else:
-                return
+                return None
 
-        # Append session to sessions.csv
         session_row = {
             'session_id': summary.get('session_id'),
             'started_at': session.start_time.isoformat() if session.start_time else '',
@@ -109,332 +394,378 @@ class SessionDatabase:
             'location': location or '',
             'equipment': equipment or ''
         }
-        with self.csv_path.open(mode='a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'session_id', 'started_at', 'ended_at', 'total_duration_seconds',
-                'active_time_seconds', 'pause_count', 'total_pause_duration_seconds', 'notes',
-                'location', 'equipment'
-            ])
-            writer.writerow(session_row)
-
-        # Append pauses to pauses.csv
-        for pause in summary.get('pauses', []):
-            pause_row = {
-                'id': pause.id,
-                'session_id': pause.session_id,
-                'reason': pause.reason or '',
-                'started_at': pause.started_at.isoformat() if pause.started_at else '',
-                'ended_at': pause.ended_at.isoformat() if pause.ended_at else '',
-                'duration_seconds': pause.duration_seconds or 0
-            }
-            with self.pauses_csv.open(mode='a', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=[
-                    'id', 'session_id', 'reason', 'started_at', 'ended_at', 'duration_seconds'
-                ])
-                writer.writerow(pause_row)
+        pause_rows = [
+            (pause.id, pause.session_id, pause.reason or '',
+             pause.started_at.isoformat() if pause.started_at else '',
+             pause.ended_at.isoformat() if pause.ended_at else '',
+             pause.duration_seconds or 0)
+            for pause in summary.get('pauses', [])
+        ]
+        return session_row, pause_rows
+
+    def save_session(self, session: StudySession, notes: str = "", location: str = "", equipment: str = ""):
+        """Save a session and its pauses to the database (plus CSV export)."""
+        rows = self.build_session_rows(session, notes, location, equipment)
+        if rows is None:
+            return
+        self.save_session_rows(*rows)
+
+    def save_session_rows(self, session_row: dict, pause_rows):
+        """Persist prebuilt session/pause rows (plus CSV export).
+
+        Safe to run on a worker thread: the rows are plain data detached
+        from the live session object.
+        """
+        with self._lock:
+            # Buffered events ride the same transaction as the session and
+            # its pauses, so a whole end-of-session costs one commit
+            with self._transaction_locked() as conn:
+                if self._event_buf:
+                    self._event_cursor.executemany(_SQL_INSERT_EVENT, self._event_buf)
+                conn.execute(
+                    _SQL_INSERT_SESSION,
+                    (session_row['session_id'], session_row['started_at'], session_row['ended_at'],
+                     session_row['total_duration_seconds'], session_row['active_time_seconds'],
+                     session_row['pause_count'], session_row['total_pause_duration_seconds'],
+                     session_row['notes'], session_row['location'], session_row['equipment']))
+                if pause_rows:
+                    conn.executemany(_SQL_INSERT_PAUSE, pause_rows)
+            self._event_buf.clear()
+
+        self.append_session_csv(session_row)
+
+    def append_session_csv(self, session_row: dict):
+        """Append a completed session to the sessions.csv export.
+
+        Locked: saves run on pool threads, so two appends could otherwise
+        interleave their bytes in the export file.
+        """
+        with self._lock:
+            if self._export_writer is None:
+                write_header = (not self.sessions_export_csv.exists()
+                                or self.sessions_export_csv.stat().st_size == 0)
+                self._export_fp = self.sessions_export_csv.open(mode='a', newline='')
+                self._export_writer = csv.writer(self._export_fp)
+                if write_header:
+                    self._export_writer.writerow(SESSION_FIELDS)
+            self._export_writer.writerow(
+                tuple(session_row.get(field, '') for field in SESSION_FIELDS))
+            self._export_fp.flush()
+
+    def close(self):
+        """Release the cached connection and export handle (also via atexit).
+
+        Takes the lock: atexit can run while a background save is still in
+        flight, and neither the export-handle teardown nor the
+        flush/optimize/close sequence may interleave with it.
+        """
+        with self._lock:
+            if self._export_fp is not None:
+                self._export_fp.close()
+                self._export_fp = None
+                self._export_writer = None
+            if self._conn is not None:
+                try:
+                    self._flush_events_locked()
+                    # Refresh planner statistics; near free when already current
+                    self._conn.execute("PRAGMA optimize")
+                except sqlite3.Error:
+                    pass
+                self._conn.close()
+                self._conn = None
+
+    # Events buffered beyond this count are flushed in one transaction
+    _EVENT_FLUSH_THRESHOLD = 20
 
     def log_event(self, session_id, event_type, event_data):
-        """Log an event (e.g., pause, mood, thoughts). Events stored inline in session notes."""
-        pass  # Events logged via save_session; can extend with events.csv if needed
+        """Log a session event (start, pause, continue, end, ...).
+
+        Events are buffered and written in batches; save_session and
+        close() flush, so nothing is lost at session end or shutdown.
+        """
+        if isinstance(event_data, str):
+            payload = event_data
+        elif not event_data:
+            payload = ''
+        elif orjson is not None:
+            payload = orjson.dumps(event_data).decode()
+        else:
+            payload = json.dumps(event_data, separators=(',', ':'))
+        with self._lock:
+            self._event_buf.append(
+                (session_id, event_type, payload, time.time_ns() // 1_000_000))
+            if len(self._event_buf) >= self._EVENT_FLUSH_THRESHOLD:
+                self._flush_events_locked()
+
+    def flush_events(self):
+        """Write any buffered session events in a single transaction."""
+        with self._lock:
+            self._flush_events_locked()
+
+    def _flush_events_locked(self):
+        if not self._event_buf:
+            return
+        # Explicit transaction: in autocommit mode a bare executemany would
+        # commit one WAL frame per row instead of one for the batch
+        with self._transaction_locked():
+            self._event_cursor.executemany(_SQL_INSERT_EVENT, self._event_buf)
+        self._event_buf.clear()
+
+    def fetch_stats_summary(self):
+        """Aggregate totals over completed sessions in one SQL round trip.
+
+        Returns (session_count, total_duration_seconds, total_pause_count);
+        the sums happen inside SQLite so no rows are materialized in Python.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(total_duration_seconds), 0),"
+                " COALESCE(SUM(pause_count), 0) FROM sessions"
+                " WHERE ended_at IS NOT NULL AND ended_at != ''").fetchone()
+        return tuple(row)
 
     def fetch_unsynced_sessions(self):
-        """Read all sessions from CSV. Since CSV has no sync flag, return all."""
-        sessions = []
-        if not self.csv_path.exists():
-            return sessions
-        with self.csv_path.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row:
-                    sessions.append(dict(row))
-        return sessions
+        """Read all sessions not yet synced to n8n."""
+        with self._lock:
+            rows = self._conn.execute(_SQL_FETCH_UNSYNCED_SESSIONS).fetchall()
+            return [SessionRow(*row) for row in rows]
 
     def fetch_unsynced_pauses_for_session(self, session_id: str):
-        """Read all pauses for a given session from pauses.csv."""
-        pauses = []
-        if not self.pauses_csv.exists():
-            return pauses
-        with self.pauses_csv.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row and row.get('session_id') == session_id:
-                    pauses.append(dict(row))
-        return pauses
+        """Read all pauses for a given session."""
+        with self._lock:
+            rows = self._conn.execute(
+                _SQL_FETCH_UNSYNCED_PAUSES, (session_id,)).fetchall()
+            return [PauseRow(*row) for row in rows]
+
+    def fetch_unsynced_pauses_for_sessions(self, session_ids):
+        """Read pauses for many sessions in few queries, grouped by session_id."""
+        pauses_by_sid = {sid: [] for sid in session_ids}
+        if not session_ids:
+            return pauses_by_sid
+        ids = list(session_ids)
+        rows = []
+        with self._lock:
+            # Same cap as the mark/delete paths: older SQLite builds allow
+            # only 999 bind variables per statement
+            for i in range(0, len(ids), self._IN_LIST_CHUNK):
+                chunk = ids[i:i + self._IN_LIST_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows.extend(self._conn.execute(
+                    f"SELECT * FROM pauses WHERE session_id IN ({placeholders})"
+                    " AND synced_to_n8n = 0",
+                    chunk).fetchall())
+        for row in rows:
+            pause = PauseRow(*row)
+            pauses_by_sid[pause.session_id].append(pause)
+        return pauses_by_sid
+
+    # Keeps IN-list statements under SQLite's bind-variable limit
+    _IN_LIST_CHUNK = 500
+
+    def _apply_in_chunks(self, sql_template: str, keys):
+        """Run an ... IN (...) statement over keys in chunks, one transaction."""
+        keys = list(keys)
+        affected = 0
+        with self._transaction_locked() as conn:
+            for i in range(0, len(keys), self._IN_LIST_CHUNK):
+                chunk = keys[i:i + self._IN_LIST_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                cur = conn.execute(sql_template.format(placeholders), chunk)
+                affected += cur.rowcount
+        return affected
+
+    def mark_pauses_synced(self, pause_ids):
+        """Flag pause rows as synced to n8n; rows stay for local stats."""
+        if not pause_ids:
+            return 0
+        with self._lock:
+            return self._apply_in_chunks(
+                "UPDATE pauses SET synced_to_n8n = 1 WHERE id IN ({})", pause_ids)
+
+    def mark_sessions_synced(self, session_ids):
+        """Flag session rows as synced to n8n; rows stay for local stats."""
+        if not session_ids:
+            return 0
+        with self._lock:
+            return self._apply_in_chunks(
+                "UPDATE sessions SET synced_to_n8n = 1 WHERE session_id IN ({})",
+                session_ids)
 
     def delete_pauses_by_ids(self, pause_ids):
-        """Remove pause rows from pauses.csv by ID."""
-        if not pause_ids or not self.pauses_csv.exists():
+        """Remove pause rows by ID."""
+        if not pause_ids:
             return 0
-        pause_ids_set = set(pause_ids)
-        rows = []
-        deleted = 0
-        with self.pauses_csv.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('id') not in pause_ids_set:
-                    rows.append(row)
-                else:
-                    deleted += 1
-
-        with self.pauses_csv.open(mode='w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'id', 'session_id', 'reason', 'started_at', 'ended_at', 'duration_seconds'
-            ])
-            writer.writeheader()
-            writer.writerows(rows)
-        return deleted
+        with self._lock:
+            return self._apply_in_chunks(
+                "DELETE FROM pauses WHERE id IN ({})", pause_ids)
 
     def delete_session_by_session_id(self, session_id: str):
-        """Remove a session row from sessions.csv by session_id."""
-        if not self.csv_path.exists():
+        """Remove a session row by session_id."""
+        return self.delete_sessions_by_session_ids([session_id])
+
+    def delete_sessions_by_session_ids(self, session_ids):
+        """Remove session rows by session_id."""
+        if not session_ids:
             return 0
-        rows = []
-        deleted = 0
-        with self.csv_path.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('session_id') != session_id:
-                    rows.append(row)
-                else:
-                    deleted += 1
-
-        with self.csv_path.open(mode='w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'session_id', 'started_at', 'ended_at', 'total_duration_seconds',
-                'active_time_seconds', 'pause_count', 'total_pause_duration_seconds', 'notes',
-                'location', 'equipment'
-            ])
-            writer.writeheader()
-            writer.writerows(rows)
-        return deleted
+        with self._lock:
+            return self._apply_in_chunks(
+                "DELETE FROM sessions WHERE session_id IN ({})", session_ids)
 
     # Catalog and profile helpers
     def get_location_catalog(self):
-        items = []
-        if self.location_catalog_csv.exists():
-            with self.location_catalog_csv.open(mode='r', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('location'):
-                        items.append(row['location'])
-        return items
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT location FROM location_catalog"
+                " ORDER BY location COLLATE NOCASE").fetchall()
+            return [row['location'] for row in rows if row['location']]
 
     def add_location(self, name: str):
         name = (name or '').strip()
         if not name:
             return False
-        existing = set(self.get_location_catalog())
-        if name in existing:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO location_catalog(location) VALUES (?)", (name,))
+            self._conn.commit()
             return True
-        with self.location_catalog_csv.open(mode='a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['location'])
-            writer.writerow({'location': name})
-        return True
 
     def remove_location(self, name: str):
-        if not self.location_catalog_csv.exists():
-            return 0
-        rows = []
-        removed = 0
-        with self.location_catalog_csv.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('location') != name:
-                    rows.append(row)
-                else:
-                    removed += 1
-        with self.location_catalog_csv.open(mode='w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['location'])
-            writer.writeheader(); writer.writerows(rows)
-        return removed
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM location_catalog WHERE location = ?", (name,))
+            self._conn.commit()
+            return cur.rowcount
 
     def get_equipment_catalog(self):
-        items = []
-        if self.equipment_catalog_csv.exists():
-            with self.equipment_catalog_csv.open(mode='r', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('equipment'):
-                        items.append(row['equipment'])
-        return items
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT equipment FROM equipment_catalog"
+                " ORDER BY equipment COLLATE NOCASE").fetchall()
+            return [row['equipment'] for row in rows if row['equipment']]
 
     def add_equipment(self, name: str):
         name = (name or '').strip()
         if not name:
             return False
-        existing = set(self.get_equipment_catalog())
-        if name in existing:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO equipment_catalog(equipment) VALUES (?)", (name,))
+            self._conn.commit()
             return True
-        with self.equipment_catalog_csv.open(mode='a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['equipment'])
-            writer.writerow({'equipment': name})
-        return True
 
     def remove_equipment(self, name: str):
-        if not self.equipment_catalog_csv.exists():
-            return 0
-        rows = []
-        removed = 0
-        with self.equipment_catalog_csv.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('equipment') != name:
-                    rows.append(row)
-                else:
-                    removed += 1
-        with self.equipment_catalog_csv.open(mode='w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['equipment'])
-            writer.writeheader(); writer.writerows(rows)
-        return removed
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM equipment_catalog WHERE equipment = ?", (name,))
+            self._conn.commit()
+            return cur.rowcount
+
+    def bulk_update_catalogs(self, add_locations=(), remove_locations=(),
+                             add_equipment=(), remove_equipment=()):
+        """Apply catalog adds and removes in a single transaction."""
+        if not (add_locations or remove_locations or add_equipment or remove_equipment):
+            return
+        with self._lock:
+            with self._transaction_locked() as conn:
+                if add_locations:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO location_catalog(location) VALUES (?)",
+                        [(n,) for n in add_locations])
+                if remove_locations:
+                    conn.executemany(
+                        "DELETE FROM location_catalog WHERE location = ?",
+                        [(n,) for n in remove_locations])
+                if add_equipment:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO equipment_catalog(equipment) VALUES (?)",
+                        [(n,) for n in add_equipment])
+                if remove_equipment:
+                    conn.executemany(
+                        "DELETE FROM equipment_catalog WHERE equipment = ?",
+                        [(n,) for n in remove_equipment])
 
     def get_profiles(self):
-        profiles = []
-        if self.profiles_csv.exists():
-            with self.profiles_csv.open(mode='r', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row:
-                        profiles.append({'name': row.get('name', ''), 'location': row.get('location', ''), 'equipment': row.get('equipment', '')})
-        return profiles
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, location, equipment FROM profiles").fetchall()
+            return [{'name': row['name'] or '', 'location': row['location'] or '',
+                     'equipment': _equipment_list(row['equipment'])} for row in rows]
 
     def get_profile(self, name: str):
         name = (name or '').strip()
-        if not name or not self.profiles_csv.exists():
+        if not name:
             return None
-        with self.profiles_csv.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('name') == name:
-                    return {'name': row.get('name', ''), 'location': row.get('location', ''), 'equipment': row.get('equipment', '')}
-        return None
-
-    def save_profile(self, name: str, location: str = "", equipment: str = ""):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, location, equipment FROM profiles WHERE name = ?",
+                (name,)).fetchone()
+        if row is None:
+            return None
+        return {'name': row['name'] or '', 'location': row['location'] or '',
+                'equipment': _equipment_list(row['equipment'])}
+
+    def save_profile(self, name: str, location: str = "", equipment=()):
+        """Save a profile; equipment may be a list of names or a legacy
+        comma-separated string."""
         name = (name or '').strip()
         if not name:
             return False
-        rows = []
-        updated = False
-        if self.profiles_csv.exists():
-            with self.profiles_csv.open(mode='r', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('name') == name:
-                        rows.append({'name': name, 'location': location or '', 'equipment': equipment or ''})
-                        updated = True
-                    else:
-                        rows.append(row)
-        if not updated:
-            rows.append({'name': name, 'location': location or '', 'equipment': equipment or ''})
-        with self.profiles_csv.open(mode='w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['name', 'location', 'equipment'])
-            writer.writeheader(); writer.writerows(rows)
-        return True
+        if isinstance(equipment, str):
+            items = [s for s in _SEP.split(equipment.strip()) if s]
+        else:
+            items = [s.strip() for s in equipment if s and s.strip()]
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles(name, location, equipment) VALUES (?,?,?)",
+                (name, location or '', json.dumps(items)))
+            self._conn.commit()
+            return True
 
     def delete_profile(self, name: str):
-        if not self.profiles_csv.exists():
-            return 0
-        rows = []
-        removed = 0
-        with self.profiles_csv.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('name') != name:
-                    rows.append(row)
-                else:
-                    removed += 1
-        with self.profiles_csv.open(mode='w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['name', 'location', 'equipment'])
-            writer.writeheader(); writer.writerows(rows)
-        return removed
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM profiles WHERE name = ?", (name,))
+            self._conn.commit()
+            return cur.rowcount
 
     def rename_profile(self, old_name: str, new_name: str):
-        if not self.profiles_csv.exists():
-            return False
         new_name = (new_name or '').strip()
         if not new_name:
             return False
-        rows = []
-        changed = False
-        with self.profiles_csv.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('name') == old_name:
-                    row['name'] = new_name
-                    changed = True
-                rows.append(row)
-        if not changed:
-            return False
-        with self.profiles_csv.open(mode='w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['name', 'location', 'equipment'])
-            writer.writeheader(); writer.writerows(rows)
-        return True
+        with self._lock:
+            cur = self._conn.execute("UPDATE profiles SET name = ? WHERE name = ?",
+                                     (new_name, old_name))
+            self._conn.commit()
+            return cur.rowcount > 0
 
-    def get_setting(self, key: str, default: str = ""):
-        """Get a setting value by key"""
-        key = (key or '').strip()
-        if not key or not self.settings_csv.exists():
-            return default
-        with self.settings_csv.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('key') == key:
-                    return row.get('value', default)
-        return default
+    def get_setting_and_profile(self, key: str, default: str = ""):
+        """Resolve a setting that names a profile in one call.
 
-    def set_setting(self, key: str, value: str = ""):
-        """Set a setting value by key"""
-        key = (key or '').strip()
-        if not key:
-            return False
-        rows = []
-        updated = False
-        if self.settings_csv.exists():
-            with self.settings_csv.open(mode='r', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('key') == key:
-                        rows.append({'key': key, 'value': value or ''})
-                        updated = True
-                    else:
-                        rows.append(row)
-        if not updated:
-            rows.append({'key': key, 'value': value or ''})
-        with self.settings_csv.open(mode='w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['key', 'value'])
-            writer.writeheader(); writer.writerows(rows)
-        return True
+        Returns (value, profile_or_None); used by the tray's cold-start
+        path so loading the last profile is a single database round trip.
+        """
+        value = self.get_setting(key, default)
+        return value, (self.get_profile(value) if value else None)
 
     def get_setting(self, key: str, default: str = ""):
         """Get a setting value by key"""
         key = (key or '').strip()
-        if not key or not self.settings_csv.exists():
+        if not key:
             return default
-        with self.settings_csv.open(mode='r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('key') == key:
-                    return row.get('value', default)
-        return default
+        if self._settings_cache is None:
+            with self._lock:
+                rows = self._conn.execute("SELECT key, value FROM settings").fetchall()
+                self._settings_cache = {row['key']: row['value'] for row in rows}
+        return self._settings_cache.get(key, default)
 
     def set_setting(self, key: str, value: str = ""):
         """Set a setting value by key"""
         key = (key or '').strip()
         if not key:
             return False
-        rows = []
-        updated = False
-        if self.settings_csv.exists():
-            with self.settings_csv.open(mode='r', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('key') == key:
-                        rows.append({'key': key, 'value': value or ''})
-                        updated = True
-                    else:
-                        rows.append(row)
-        if not updated:
-            rows.append({'key': key, 'value': value or ''})
-        with self.settings_csv.open(mode='w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['key', 'value'])
-            writer.writeheader(); writer.writerows(rows)
-        return True
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO settings(key, value) VALUES (?,?)",
+                               (key, value or ''))
+            self._conn.commit()
+            if self._settings_cache is not None:
+                self._settings_cache[key] = value or ''
+            return True
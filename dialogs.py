@@ -1,8 +1,78 @@
 #!/usr/bin/env python3
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTextEdit, QPushButton, QComboBox, QLineEdit, QListWidget, QListWidgetItem, QTabWidget, QWidget, QMessageBox, QInputDialog
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from functools import lru_cache
+
 from db import SessionDatabase
-from utils import check_connectivity
+from utils import cached_connectivity, check_connectivity
+
+
+@lru_cache(maxsize=2048)
+def _norm(s):
+    """Stripped form of a user-typed or DB-returned name, memoized so
+    catalog names recurring across dialog opens aren't re-stripped."""
+    return (s or '').strip()
+
+
+class _CatalogCache:
+    """Per-dialog snapshot of catalog and profile reads.
+
+    Dialogs consult the same catalogs many times while open; each list is
+    fetched once on first use and refetched only after the dialog writes.
+    """
+    def __init__(self, db: SessionDatabase):
+        self.db = db
+        self._locations = None
+        self._equipment = None
+        self._profiles = None
+
+    @property
+    def locations(self):
+        if self._locations is None:
+            self._locations = self.db.get_location_catalog()
+        return self._locations
+
+    @property
+    def equipment(self):
+        if self._equipment is None:
+            self._equipment = self.db.get_equipment_catalog()
+        return self._equipment
+
+    @property
+    def profiles(self):
+        if self._profiles is None:
+            self._profiles = self.db.get_profiles()
+        return self._profiles
+
+    def invalidate_locations(self):
+        self._locations = None
+
+    def invalidate_equipment(self):
+        self._equipment = None
+
+    def invalidate_profiles(self):
+        self._profiles = None
+
+
+class _ConnectivityTask(QRunnable):
+    """Runs the blocking connectivity probe on the global thread pool.
+
+    Pool threads outlive the dialog, so there is no QThread to tear down
+    if the user closes it mid-probe; the result comes back through a
+    queued signal, and Qt drops the connection if the dialog is gone.
+    """
+
+    class _Emitter(QObject):
+        done = pyqtSignal(bool, float)
+
+    def __init__(self):
+        super().__init__()
+        self.emitter = self._Emitter()
+
+    def run(self):
+        reachable, latency = check_connectivity()
+        self.emitter.done.emit(reachable, latency)
+
 
 class InputDialog(QDialog):
     def __init__(self, parent=None, title="Input", label="Enter text:", multiline=True):
@@ -20,8 +90,10 @@ class InputDialog(QDialog):
         if multiline:
             self.text_input = QTextEdit()
             self.text_input.setMinimumHeight(100)
+            self._read_text = self.text_input.toPlainText
         else:
             self.text_input = QLineEdit()
+            self._read_text = self.text_input.text
         self.text_input.setPlaceholderText("(optional)")
         layout.addWidget(self.text_input)
         
@@ -39,10 +111,9 @@ class InputDialog(QDialog):
         self.setLayout(layout)
     
     def get_text(self):
-        if hasattr(self.text_input, 'toPlainText'):
-            return self.text_input.toPlainText().strip()
-        else:
-            return self.text_input.text().strip()
+        # Bound at construction to the widget's own getter, so no
+        # per-call hasattr probing of the widget type
+        return self._read_text().strip()
 
 
 class SelectDialog(QDialog):
@@ -86,14 +157,16 @@ class EnvironmentDialog(QDialog):
         self.setWindowTitle(title)
         self.setMinimumWidth(420)
         self.db = db or SessionDatabase()
+        self._cache = _CatalogCache(self.db)
 
         layout = QVBoxLayout(); layout.setSpacing(10); layout.setContentsMargins(16, 16, 16, 16)
         layout.addWidget(QLabel(label))
 
-        # Connectivity status
+        # Connectivity status; probed on a worker thread so the dialog
+        # paints immediately instead of waiting on the network
         self.conn_label = QLabel("Checking connectivity…")
         layout.addWidget(self.conn_label)
-        self._update_connectivity_label()
+        self._start_connectivity_check()
 
         # Profiles row
         prof_row = QHBoxLayout(); prof_row.setSpacing(8)
@@ -119,7 +192,14 @@ class EnvironmentDialog(QDialog):
 
         # Equipment check-list
         layout.addWidget(QLabel("Equipment:"))
-        self.equipment_list = QListWidget(); self._reload_equipment()
+        # Name -> item index kept in lockstep with the widget for O(1) lookups
+        self._equipment_items = {}
+        # Checked names tracked event-style via itemChanged instead of
+        # polling checkState() across the whole widget on every read
+        self._checked = set()
+        self.equipment_list = QListWidget()
+        self.equipment_list.itemChanged.connect(self._on_equipment_item_changed)
+        self._reload_equipment()
         self.equipment_list.setMinimumHeight(140)
         layout.addWidget(self.equipment_list)
         # Add equipment row
@@ -140,8 +220,19 @@ class EnvironmentDialog(QDialog):
 
         self.setLayout(layout)
 
-    def _update_connectivity_label(self):
-        reachable, latency = check_connectivity()
+    def _start_connectivity_check(self):
+        # Fresh cached result: label it immediately, no probe thread
+        cached = cached_connectivity()
+        if cached is not None:
+            self._apply_connectivity_label(*cached)
+            return
+        task = _ConnectivityTask()
+        task.emitter.done.connect(self._apply_connectivity_label)
+        # Keep the emitter alive until its queued signal is delivered
+        self._conn_task = task
+        QThreadPool.globalInstance().start(task)
+
+    def _apply_connectivity_label(self, reachable, latency):
         if reachable:
             self.conn_label.setText(f"Online ✅ ({latency:.0f} ms)")
         else:
@@ -149,66 +240,71 @@ class EnvironmentDialog(QDialog):
 
     def _reload_profiles(self):
         self.profile_combo.clear()
-        profiles = self.db.get_profiles()
+        profiles = self._cache.profiles
         self.profile_combo.addItem("")
         for p in profiles:
             self.profile_combo.addItem(p.get('name', ''))
 
     def _reload_locations(self):
         self.location_combo.clear()
-        locs = self.db.get_location_catalog()
+        locs = self._cache.locations
         if not locs:
             locs = ["home", "class", "transports"]
         self.location_combo.addItems(locs)
+        self._location_names = set(locs)
 
     def _load_profile(self):
-        name = self.profile_combo.currentText().strip()
+        name = _norm(self.profile_combo.currentText())
         if not name:
             return
         prof = self.db.get_profile(name)
         if not prof:
             return
         loc = prof.get('location', '') or ''
-        eq = prof.get('equipment', '') or ''
         # Ensure location present in combo
-        if loc and loc not in [self.location_combo.itemText(i) for i in range(self.location_combo.count())]:
+        if loc and loc not in self._location_names:
             self.location_combo.addItem(loc)
+            self._location_names.add(loc)
         if loc:
             self.location_combo.setCurrentText(loc)
-        # Select matching equipment items
-        wanted = {s.strip() for s in eq.split(',') if s.strip()}
-        # Ensure all wanted items exist in list
-        existing = {self.equipment_list.item(i).text(): i for i in range(self.equipment_list.count())}
-        for name in wanted:
-            if name not in existing:
-                self._add_equipment_to_list(name, checked=True, persist=True)
-        # Now set checks
-        for i in range(self.equipment_list.count()):
-            item = self.equipment_list.item(i)
-            item.setCheckState(Qt.Checked if item.text() in wanted else Qt.Unchecked)
+        # Select matching equipment items; stored pre-normalized as a list
+        wanted = set(prof.get('equipment') or [])
+        # Batch the check-state writes with signals blocked, then set
+        # the tracked selection in one assignment
+        self.equipment_list.blockSignals(True)
+        try:
+            for name in wanted:
+                if name not in self._equipment_items:
+                    self._add_equipment_to_list(name, checked=True, persist=True)
+            for name, item in self._equipment_items.items():
+                item.setCheckState(Qt.Checked if name in wanted else Qt.Unchecked)
+        finally:
+            self.equipment_list.blockSignals(False)
+        self._checked = wanted
 
     def _save_profile(self):
-        name = self.profile_combo.currentText().strip()
+        name = _norm(self.profile_combo.currentText())
         if not name:
             return
-        loc = self.location_combo.currentText().strip()
-        eq_list = self._selected_equipment()
-        eq = ", ".join(eq_list)
-        self.db.save_profile(name, loc, eq)
+        loc = _norm(self.location_combo.currentText())
+        self.db.save_profile(name, loc, self._selected_equipment())
         # Persist new location in catalog if new
         if loc:
             self.db.add_location(loc)
+            self._cache.invalidate_locations()
+        self._cache.invalidate_profiles()
         self._reload_profiles()
 
     def _delete_profile(self):
-        name = self.profile_combo.currentText().strip()
+        name = _norm(self.profile_combo.currentText())
         if not name:
             return
         self.db.delete_profile(name)
+        self._cache.invalidate_profiles()
         self._reload_profiles()
 
     def get_result(self):
-        loc = self.location_combo.currentText().strip()
+        loc = _norm(self.location_combo.currentText())
         eq_list = self._selected_equipment()
         eq = ", ".join(eq_list)
         # Persist new location in catalog if new
@@ -221,43 +317,62 @@ class EnvironmentDialog(QDialog):
 
     def _reload_equipment(self):
         self.equipment_list.clear()
-        for name in self.db.get_equipment_catalog():
-            self._add_equipment_to_list(name, checked=False, persist=False)
+        self._equipment_items.clear()
+        # One repaint and no signal storms while bulk-populating
+        self.equipment_list.setUpdatesEnabled(False)
+        self.equipment_list.blockSignals(True)
+        self._checked.clear()
+        try:
+            for name in self._cache.equipment:
+                self._add_equipment_to_list(name, checked=False, persist=False)
+        finally:
+            self.equipment_list.blockSignals(False)
+            self.equipment_list.setUpdatesEnabled(True)
 
     def _add_equipment_to_list(self, name: str, checked: bool = True, persist: bool = False):
-        name = (name or '').strip()
+        name = _norm(name)
         if not name:
             return
         # Avoid duplicates in UI
-        for i in range(self.equipment_list.count()):
-            if self.equipment_list.item(i).text() == name:
-                # If exists, just ensure checked if requested
-                if checked:
-                    self.equipment_list.item(i).setCheckState(Qt.Checked)
-                return
+        existing = self._equipment_items.get(name)
+        if existing is not None:
+            # If exists, just ensure checked if requested
+            if checked:
+                existing.setCheckState(Qt.Checked)
+            return
         item = QListWidgetItem(name)
         item.setFlags(item.flags() | Qt.ItemIsUserCheckable | Qt.ItemIsEnabled | Qt.ItemIsSelectable)
         item.setCheckState(Qt.Checked if checked else Qt.Unchecked)
         self.equipment_list.addItem(item)
+        self._equipment_items[name] = item
+        # The initial state is set before insertion, so itemChanged never
+        # fires for it; record it here
+        if checked:
+            self._checked.add(name)
         if persist:
             self.db.add_equipment(name)
+            self._cache.invalidate_equipment()
 
     def _add_equipment(self):
-        name = self.new_equipment_input.text().strip()
+        name = _norm(self.new_equipment_input.text())
         if not name:
             return
         # Persist to catalog and add to list
         self.db.add_equipment(name)
+        self._cache.invalidate_equipment()
         self._add_equipment_to_list(name, checked=True, persist=False)
         self.new_equipment_input.clear()
 
+    def _on_equipment_item_changed(self, item):
+        if item.checkState() == Qt.Checked:
+            self._checked.add(item.text())
+        else:
+            self._checked.discard(item.text())
+
     def _selected_equipment(self):
-        result = []
-        for i in range(self.equipment_list.count()):
-            item = self.equipment_list.item(i)
-            if item.checkState() == Qt.Checked:
-                result.append(item.text())
-        return result
+        # The itemChanged slot keeps _checked current, so reading the
+        # selection never touches the widget
+        return sorted(self._checked)
 
 
 class SettingsDialog(QDialog):
@@ -267,14 +382,21 @@ class SettingsDialog(QDialog):
         self.setMinimumWidth(550)
         self.setMinimumHeight(450)
         self.db = db or SessionDatabase()
+        self._cache = _CatalogCache(self.db)
 
         layout = QVBoxLayout(); layout.setSpacing(10); layout.setContentsMargins(16, 16, 16, 16)
 
-        # Tabbed interface
+        # Tabbed interface; tabs are built lazily on first visit so
+        # opening Settings pays for one catalog read, not three
         self.tabs = QTabWidget()
-        self.tabs.addTab(self._build_profiles_tab(), "Profiles")
-        self.tabs.addTab(self._build_locations_tab(), "Locations")
-        self.tabs.addTab(self._build_equipment_tab(), "Equipment")
+        self._tab_builders = [self._build_profiles_tab,
+                              self._build_locations_tab,
+                              self._build_equipment_tab]
+        self._tab_built = [False, False, False]
+        for name in ("Profiles", "Locations", "Equipment"):
+            self.tabs.addTab(QWidget(), name)
+        self.tabs.currentChanged.connect(self._ensure_tab_built)
+        self._ensure_tab_built(0)
         layout.addWidget(self.tabs)
 
         # Buttons
@@ -284,6 +406,16 @@ class SettingsDialog(QDialog):
         btns.addWidget(ok_btn); btns.addWidget(cancel_btn); layout.addLayout(btns)
         self.setLayout(layout)
 
+    def _ensure_tab_built(self, index):
+        if index < 0 or self._tab_built[index]:
+            return
+        self._tab_built[index] = True
+        name = self.tabs.tabText(index)
+        real_tab = self._tab_builders[index]()
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, real_tab, name)
+        self.tabs.setCurrentIndex(index)
+
     def _build_profiles_tab(self):
         tab = QWidget()
         layout = QVBoxLayout(); layout.setSpacing(10); layout.setContentsMargins(10, 10, 10, 10)
@@ -300,20 +432,35 @@ class SettingsDialog(QDialog):
         delete_btn = QPushButton("Delete"); delete_btn.clicked.connect(self._delete_profile_from_list)
         btn_row.addWidget(create_btn); btn_row.addWidget(edit_btn); btn_row.addWidget(rename_btn); btn_row.addWidget(delete_btn)
         layout.addLayout(btn_row)
-        
+
+        # Inline feedback instead of modal info popups
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
         layout.addStretch()
         tab.setLayout(layout)
         return tab
 
+    def _flash(self, message: str):
+        """Show transient feedback without a modal round-trip."""
+        self.status_label.setText(message)
+        QTimer.singleShot(3000, self.status_label.clear)
+
     def _build_locations_tab(self):
         tab = QWidget()
         layout = QVBoxLayout(); layout.setSpacing(10); layout.setContentsMargins(10, 10, 10, 10)
         layout.addWidget(QLabel("Manage location catalog:"))
         
-        self._orig_locations = set(self.db.get_location_catalog())
+        # Catalog arrives sorted from SQL (ORDER BY ... COLLATE NOCASE)
+        ordered = self._cache.locations
+        self._orig_locations = frozenset(ordered)
         self.locations_list = QListWidget(); self.locations_list.setMinimumHeight(200)
-        for loc in sorted(self._orig_locations):
-            self._add_list_item(self.locations_list, loc)
+        self.locations_list.setUpdatesEnabled(False)
+        try:
+            self.locations_list.addItems(ordered)
+        finally:
+            self.locations_list.setUpdatesEnabled(True)
+        self._loc_names = set(ordered)
         layout.addWidget(self.locations_list)
         
         loc_row = QHBoxLayout(); loc_row.setSpacing(8)
@@ -332,10 +479,16 @@ class SettingsDialog(QDialog):
         layout = QVBoxLayout(); layout.setSpacing(10); layout.setContentsMargins(10, 10, 10, 10)
         layout.addWidget(QLabel("Manage equipment catalog:"))
         
-        self._orig_equipment = set(self.db.get_equipment_catalog())
+        # Catalog arrives sorted from SQL (ORDER BY ... COLLATE NOCASE)
+        ordered = self._cache.equipment
+        self._orig_equipment = frozenset(ordered)
         self.equipment_list2 = QListWidget(); self.equipment_list2.setMinimumHeight(200)
-        for eq in sorted(self._orig_equipment):
-            self._add_list_item(self.equipment_list2, eq)
+        self.equipment_list2.setUpdatesEnabled(False)
+        try:
+            self.equipment_list2.addItems(ordered)
+        finally:
+            self.equipment_list2.setUpdatesEnabled(True)
+        self._eq_names = set(ordered)
         layout.addWidget(self.equipment_list2)
         
         eq_row = QHBoxLayout(); eq_row.setSpacing(8)
@@ -351,7 +504,7 @@ class SettingsDialog(QDialog):
 
     def _reload_profiles_list(self):
         self.profiles_list.clear()
-        for prof in self.db.get_profiles():
+        for prof in self._cache.profiles:
             name = prof.get('name', '')
             if name:
                 self.profiles_list.addItem(QListWidgetItem(name))
@@ -365,15 +518,17 @@ class SettingsDialog(QDialog):
         if self.db.get_profile(name):
             QMessageBox.warning(self, "Profile Exists", f"A profile named '{name}' already exists.")
             return
-        # Create with empty environment
+        # Create with empty environment; append the one new row instead
+        # of refetching and rebuilding the whole list
         self.db.save_profile(name, location="", equipment="")
-        self._reload_profiles_list()
-        QMessageBox.information(self, "Profile Created", f"Profile '{name}' created. Click 'Edit' to set location and equipment.")
+        self._cache.invalidate_profiles()
+        self.profiles_list.addItem(QListWidgetItem(name))
+        self._flash(f"Profile '{name}' created — click 'Edit' to set location and equipment.")
 
     def _edit_profile(self):
         selected = self.profiles_list.selectedItems()
         if not selected:
-            QMessageBox.information(self, "No Selection", "Select a profile to edit.")
+            self._flash("Select a profile to edit.")
             return
         name = selected[0].text()
         prof = self.db.get_profile(name)
@@ -381,13 +536,13 @@ class SettingsDialog(QDialog):
             return
         
         # Open a mini environment editor
-        dlg = ProfileEditDialog(self, db=self.db, profile_name=name, 
-                                location=prof.get('location', ''), 
-                                equipment=prof.get('equipment', ''))
+        dlg = ProfileEditDialog(self, db=self.db, profile_name=name,
+                                location=prof.get('location', ''),
+                                equipment=prof.get('equipment', ()))
         if dlg.exec_() == dlg.Accepted:
             loc, eq = dlg.get_result()
             self.db.save_profile(name, loc, eq)
-            QMessageBox.information(self, "Profile Updated", f"Profile '{name}' saved.")
+            self._flash(f"Profile '{name}' saved.")
 
 
     def _rename_profile(self):
@@ -398,7 +553,8 @@ class SettingsDialog(QDialog):
         new_name, ok = QInputDialog.getText(self, "Rename Profile", f"New name for '{old_name}':")
         if ok and new_name.strip():
             self.db.rename_profile(old_name, new_name.strip())
-            self._reload_profiles_list()
+            self._cache.invalidate_profiles()
+            selected[0].setText(new_name.strip())
 
     def _delete_profile_from_list(self):
         selected = self.profiles_list.selectedItems()
@@ -406,79 +562,83 @@ class SettingsDialog(QDialog):
             return
         name = selected[0].text()
         self.db.delete_profile(name)
-        self._reload_profiles_list()
+        self._cache.invalidate_profiles()
+        self.profiles_list.takeItem(self.profiles_list.row(selected[0]))
 
 
-    def _add_list_item(self, widget: QListWidget, text: str):
-        text = (text or '').strip()
+    def _add_list_item(self, widget: QListWidget, names: set, text: str):
+        text = _norm(text)
         if not text:
             return
         # Avoid duplicates
-        for i in range(widget.count()):
-            if widget.item(i).text() == text:
-                return
+        if text in names:
+            return
         widget.addItem(QListWidgetItem(text))
+        names.add(text)
 
     def _add_location(self):
-        name = self.new_location_input.text().strip()
+        name = _norm(self.new_location_input.text())
         if not name:
             return
-        self._add_list_item(self.locations_list, name)
+        self._add_list_item(self.locations_list, self._loc_names, name)
         self.new_location_input.clear()
 
     def _add_equipment2(self):
-        name = self.new_equipment_input2.text().strip()
+        name = _norm(self.new_equipment_input2.text())
         if not name:
             return
-        self._add_list_item(self.equipment_list2, name)
+        self._add_list_item(self.equipment_list2, self._eq_names, name)
         self.new_equipment_input2.clear()
 
     def _remove_selected_locations(self):
         for item in self.locations_list.selectedItems():
+            self._loc_names.discard(item.text())
             self.locations_list.takeItem(self.locations_list.row(item))
 
     def _remove_selected_equipment(self):
         for item in self.equipment_list2.selectedItems():
+            self._eq_names.discard(item.text())
             self.equipment_list2.takeItem(self.equipment_list2.row(item))
 
     def accept(self):
-        # Save diffs for locations and equipment on close
-        final_locations = {self.locations_list.item(i).text() for i in range(self.locations_list.count())}
-        final_equipment = {self.equipment_list2.item(i).text() for i in range(self.equipment_list2.count())}
-
-        # Compute diffs
-        to_add_loc = final_locations - self._orig_locations
-        to_remove_loc = self._orig_locations - final_locations
-        to_add_eq = final_equipment - self._orig_equipment
-        to_remove_eq = self._orig_equipment - final_equipment
-
-        # Apply
-        for n in sorted(to_add_loc):
-            self.db.add_location(n)
-        for n in sorted(to_remove_loc):
-            self.db.remove_location(n)
-        for n in sorted(to_add_eq):
-            self.db.add_equipment(n)
-        for n in sorted(to_remove_eq):
-            self.db.remove_equipment(n)
+        # Save diffs for locations and equipment on close; the maintained
+        # name sets already mirror the widgets. Unvisited tabs were never
+        # built and therefore hold no edits.
+        to_add_loc = to_remove_loc = to_add_eq = to_remove_eq = ()
+        if self._tab_built[1]:
+            to_add_loc = self._loc_names - self._orig_locations
+            to_remove_loc = self._orig_locations - self._loc_names
+        if self._tab_built[2]:
+            to_add_eq = self._eq_names - self._orig_equipment
+            to_remove_eq = self._orig_equipment - self._eq_names
+
+        # Apply all diffs in one transaction (one fsync). Write order is
+        # irrelevant to INSERT OR IGNORE / DELETE, so the diffs go in
+        # unsorted — the catalogs come back ordered from SQL anyway.
+        self.db.bulk_update_catalogs(
+            add_locations=to_add_loc,
+            remove_locations=to_remove_loc,
+            add_equipment=to_add_eq,
+            remove_equipment=to_remove_eq)
 
         super().accept()
 
 
 class ProfileEditDialog(QDialog):
     """Mini dialog to edit a profile's location and equipment."""
-    def __init__(self, parent=None, db: SessionDatabase = None, profile_name: str = "", location: str = "", equipment: str = ""):
+    def __init__(self, parent=None, db: SessionDatabase = None, profile_name: str = "", location: str = "", equipment=()):
         super().__init__(parent)
         self.setWindowTitle(f"Edit Profile: {profile_name}")
         self.setMinimumWidth(450)
         self.db = db or SessionDatabase()
+        self._cache = _CatalogCache(self.db)
         
         layout = QVBoxLayout(); layout.setSpacing(10); layout.setContentsMargins(16, 16, 16, 16)
         
         # Location
         layout.addWidget(QLabel("Location:"))
         self.location_combo = QComboBox(); self.location_combo.setEditable(True)
-        locs = self.db.get_location_catalog()
+        locs = self._cache.locations
         if locs:
             self.location_combo.addItems(locs)
         if location:
@@ -487,7 +647,10 @@ class ProfileEditDialog(QDialog):
         
         # Equipment (checkboxes)
         layout.addWidget(QLabel("Equipment:"))
+        self._equipment_items = {}
+        self._checked = set()
         self.equipment_list = QListWidget(); self.equipment_list.setMinimumHeight(150)
+        self.equipment_list.itemChanged.connect(self._on_equipment_item_changed)
         self._load_equipment(equipment)
         layout.addWidget(self.equipment_list)
         
@@ -507,52 +670,63 @@ class ProfileEditDialog(QDialog):
         
         self.setLayout(layout)
     
-    def _load_equipment(self, equipment_str: str):
-        catalog = self.db.get_equipment_catalog()
-        wanted = {s.strip() for s in equipment_str.split(',') if s.strip()}
+    def _load_equipment(self, equipment):
+        catalog = self._cache.equipment
+        wanted = set(equipment or ())
         
+        self.equipment_list.setUpdatesEnabled(False)
+        self.equipment_list.blockSignals(True)
         # Show all catalog items
         for eq in catalog:
             item = QListWidgetItem(eq)
             item.setFlags(item.flags() | Qt.ItemIsUserCheckable | Qt.ItemIsEnabled | Qt.ItemIsSelectable)
             item.setCheckState(Qt.Checked if eq in wanted else Qt.Unchecked)
             self.equipment_list.addItem(item)
+            self._equipment_items[eq] = item
         
         # Add any wanted items not in catalog
         for eq in wanted:
-            if eq not in catalog:
+            if eq not in self._equipment_items:
                 item = QListWidgetItem(eq)
                 item.setFlags(item.flags() | Qt.ItemIsUserCheckable | Qt.ItemIsEnabled | Qt.ItemIsSelectable)
                 item.setCheckState(Qt.Checked)
                 self.equipment_list.addItem(item)
+                self._equipment_items[eq] = item
+        self.equipment_list.blockSignals(False)
+        self.equipment_list.setUpdatesEnabled(True)
+        self._checked = set(wanted)
+
+    def _on_equipment_item_changed(self, item):
+        if item.checkState() == Qt.Checked:
+            self._checked.add(item.text())
+        else:
+            self._checked.discard(item.text())
     
     def _add_equipment(self):
-        name = self.new_equipment_input.text().strip()
+        name = _norm(self.new_equipment_input.text())
         if not name:
             return
         # Add to catalog
         self.db.add_equipment(name)
         # Add to list if not present
-        for i in range(self.equipment_list.count()):
-            if self.equipment_list.item(i).text() == name:
-                self.equipment_list.item(i).setCheckState(Qt.Checked)
-                self.new_equipment_input.clear()
-                return
+        existing = self._equipment_items.get(name)
+        if existing is not None:
+            existing.setCheckState(Qt.Checked)
+            self.new_equipment_input.clear()
+            return
         item = QListWidgetItem(name)
         item.setFlags(item.flags() | Qt.ItemIsUserCheckable | Qt.ItemIsEnabled | Qt.ItemIsSelectable)
         item.setCheckState(Qt.Checked)
         self.equipment_list.addItem(item)
+        self._equipment_items[name] = item
+        # State was set before insertion, so itemChanged didn't fire
+        self._checked.add(name)
         self.new_equipment_input.clear()
     
     def get_result(self):
-        loc = self.location_combo.currentText().strip()
-        selected_eq = []
-        for i in range(self.equipment_list.count()):
-            item = self.equipment_list.item(i)
-            if item.checkState() == Qt.Checked:
-                selected_eq.append(item.text())
-        eq = ", ".join(selected_eq)
+        loc = _norm(self.location_combo.currentText())
+        selected_eq = sorted(self._checked)
         # Persist new location if needed
         if loc:
             self.db.add_location(loc)
-        return loc, eq
+        return loc, selected_eq
@@ -4,42 +4,68 @@ Centralized logging for Study Session Manager
 Logs are stored in ~/.local/share/study-session/logs/
 """
 
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
 
+_LOG_DIR = Path.home() / '.local/share/study-session' / 'logs'
+
+# Built once at import instead of per setup_logger call
+_FILE_FMT = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+_CONSOLE_FMT = logging.Formatter('%(message)s')
+
+# One shared queue/listener pair feeds the real handlers from a
+# background thread, so logging from UI slots is just an enqueue
+_queue = None
+_listener = None
+
+
+def _start_listener():
+    """Build the file/console handlers once and start the listener thread."""
+    global _queue, _listener
+    if _listener is not None:
+        return
+    _LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Create log file with date; delay=True defers opening the file
+    # until the first record arrives
+    log_file = _LOG_DIR / f"session_manager_{datetime.now().strftime('%Y%m%d')}.log"
+
+    # File handler - detailed logs; shared by every named logger via the
+    # listener, so the path is only ever opened once
+    file_handler = logging.FileHandler(log_file, delay=True)
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(_FILE_FMT)
+
+    # Console handler - important messages only
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(_CONSOLE_FMT)
+
+    _queue = queue.SimpleQueue()
+    _listener = QueueListener(_queue, file_handler, console_handler,
+                              respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
 
 def setup_logger(name: str, level=logging.INFO) -> logging.Logger:
     """Create a logger that writes to both file and console"""
-    log_dir = Path.home() / '.local/share/study-session' / 'logs'
-    log_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Create log file with date
-    log_file = log_dir / f"session_manager_{datetime.now().strftime('%Y%m%d')}.log"
-    
+    _start_listener()
+
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
+
     # Avoid duplicate handlers
     if logger.handlers:
         return logger
-    
-    # File handler - detailed logs
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    file_handler.setFormatter(file_formatter)
-    
-    # Console handler - important messages only
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_formatter = logging.Formatter('%(message)s')
-    console_handler.setFormatter(console_formatter)
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+
+    logger.addHandler(QueueHandler(_queue))
+
     return logger
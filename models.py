@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
-import uuid
+from os import urandom
+import time
 from PyQt5.QtCore import QObject, pyqtSignal
 
 @dataclass
@@ -12,18 +14,24 @@ class Pause:
     started_at: datetime = None
     ended_at: datetime = None
     duration_seconds: int = 0
-    
+    # Monotonic counterparts used for duration math; the datetime
+    # fields are kept for display and persistence only
+    _start_monotonic: float = 0.0
+    _end_monotonic: float = 0.0
+
     def __post_init__(self):
         if self.id is None:
-            self.id = str(uuid.uuid4())[:8]
-    
+            self.id = urandom(4).hex()
+
     @classmethod
     def create(cls, session_id: str, reason: str = "") -> 'Pause':
-        return cls(session_id=session_id, reason=reason, started_at=datetime.now())
-    
+        return cls(session_id=session_id, reason=reason,
+                   started_at=datetime.now(), _start_monotonic=time.monotonic())
+
     def end(self) -> int:
         self.ended_at = datetime.now()
-        self.duration_seconds = int((self.ended_at - self.started_at).total_seconds())
+        self._end_monotonic = time.monotonic()
+        self.duration_seconds = int(self._end_monotonic - self._start_monotonic)
         return self.duration_seconds
     
     def is_active(self) -> bool:
@@ -33,39 +41,57 @@ class Pause:
 class PauseManager:
     def __init__(self):
         self.active_pauses = {}
-        self.completed_pauses = []
-    
+        # Per-session index and running totals are the source of truth;
+        # completed pauses aren't duplicated in a flat history list
+        self._by_session = defaultdict(list)
+        self._totals = defaultdict(int)
+
+    @property
+    def completed_pauses(self) -> list:
+        """Flat view over all completed pauses, built on demand."""
+        return [p for pauses in self._by_session.values() for p in pauses]
+
     def start_pause(self, session_id: str, reason: str = "") -> Pause:
         if session_id in self.active_pauses:
             return None
         pause = Pause.create(session_id, reason)
         self.active_pauses[session_id] = pause
         return pause
-    
+
     def end_pause(self, session_id: str) -> int:
         if session_id not in self.active_pauses:
             return 0
         pause = self.active_pauses.pop(session_id)
         duration = pause.end()
-        self.completed_pauses.append(pause)
+        self._by_session[session_id].append(pause)
+        self._totals[session_id] += duration
         return duration
-    
+
     def resume_session(self, session_id: str) -> int:
         return self.end_pause(session_id)
-    
+
     def get_session_total_pause_time(self, session_id: str) -> int:
-        return sum(p.duration_seconds for p in self.completed_pauses if p.session_id == session_id)
-    
+        return self._totals.get(session_id, 0)
+
+    def has_active_pauses(self) -> bool:
+        return bool(self.active_pauses)
+
     def get_active_pauses(self) -> list:
         return list(self.active_pauses.values())
-    
-    def get_session_pauses(self, session_id: str) -> list:
+
+    def iter_session_pauses(self, session_id: str):
+        """Yield the session's pauses (active first) without building a list."""
         active = self.active_pauses.get(session_id)
-        completed = [p for p in self.completed_pauses if p.session_id == session_id]
-        return ([active] if active else []) + completed
-    
+        if active is not None:
+            yield active
+        yield from self._by_session.get(session_id, ())
+
+    def get_session_pauses(self, session_id: str) -> list:
+        return list(self.iter_session_pauses(session_id))
+
     def get_session_pause_count(self, session_id: str) -> int:
-        return len(self.get_session_pauses(session_id))
+        active = 1 if session_id in self.active_pauses else 0
+        return active + len(self._by_session.get(session_id, ()))
 
 
 class StudySession(QObject):
@@ -77,16 +103,37 @@ class StudySession(QObject):
         self.is_running = False
         self.start_time = None
         self.end_time = None
+        self._start_monotonic = 0.0
+        self._last_status = ""
         self.pause_manager = PauseManager()
-    
+
+    def reset(self):
+        """Clear state in place so the QObject and its signal
+        connections can be reused for the next session."""
+        self.id = None
+        self.is_running = False
+        self.start_time = None
+        self.end_time = None
+        self._start_monotonic = 0.0
+        self._last_status = ""
+        self.pause_manager = PauseManager()
+
+    def _set_status(self, status: str):
+        # Emit only on actual change so slots (tray repaints) don't run
+        # for no-op transitions
+        if status != self._last_status:
+            self._last_status = status
+            self.status_changed.emit(status)
+
     def start(self) -> bool:
         if self.is_running:
             return False
         self.id = datetime.now().strftime('%Y%m%d_%H%M%S')
         self.is_running = True
         self.start_time = datetime.now()
+        self._start_monotonic = time.monotonic()
         self.pause_manager = PauseManager()
-        self.status_changed.emit("▶️ Running")
+        self._set_status("▶️ Running")
         return True
     
     def pause(self, reason: str = "") -> Pause:
@@ -94,7 +141,7 @@ class StudySession(QObject):
             return None
         pause = self.pause_manager.start_pause(self.id, reason)
         if pause:
-            self.status_changed.emit("⏸️ Paused")
+            self._set_status("⏸️ Paused")
         return pause
     
     def resume(self) -> int:
@@ -102,7 +149,7 @@ class StudySession(QObject):
             return 0
         duration = self.pause_manager.resume_session(self.id)
         if duration > 0:
-            self.status_changed.emit("▶️ Running")
+            self._set_status("▶️ Running")
         return duration
     
     def end(self) -> dict:
@@ -114,12 +161,16 @@ class StudySession(QObject):
         active_pause = self.pause_manager.active_pauses.get(self.id)
         if active_pause:
             self.end_time = active_pause.started_at
+            end_monotonic = active_pause._start_monotonic
             # Remove the active pause without completing it
             del self.pause_manager.active_pauses[self.id]
         else:
             self.end_time = datetime.now()
-        
-        total_duration = int((self.end_time - self.start_time).total_seconds())
+            end_monotonic = time.monotonic()
+
+        # Durations come from the monotonic clock so wall-clock jumps
+        # (NTP steps, DST) can't skew the totals
+        total_duration = int(end_monotonic - self._start_monotonic)
         total_pause = self.pause_manager.get_session_total_pause_time(self.id)
         active_time = total_duration - total_pause
         pause_count = self.pause_manager.get_session_pause_count(self.id)
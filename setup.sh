@@ -36,12 +36,9 @@ Environment:
     N8N_SESSION_LOG_ENDPOINT=session-log
     N8N_SESSION_PAUSES_ENDPOINT=session-pauses
 
-Local Data (CSV):
-  ~/.local/share/study-session/sessions.csv
-  ~/.local/share/study-session/pauses.csv
-  ~/.local/share/study-session/location_catalog.csv
-  ~/.local/share/study-session/equipment_catalog.csv
-  ~/.local/share/study-session/profiles.csv
+Local Data:
+  ~/.local/share/study-session/sessions.db   (SQLite database)
+  ~/.local/share/study-session/sessions.csv  (human-readable export)
 EOF
 }
 
@@ -3,19 +3,6 @@
 Study Session Manager — Main Entrypoint
 Clean, modular app using PyQt5 system tray.
 
-Project structure:
-- models.py: Pause, PauseManager, StudySession
-- db.py: SessionDatabase
-- api.py: SessionAPIManager
-- dialogs.py: InputDialog, SelectDialog
-- tray.py: StudySessionTray (UI and actions)
-- study_session_tray_standalone.py: Entrypoint (this file)
-"""
-#!/usr/bin/env python3
-"""
-Study Session Manager — Main Entrypoint
-Clean, modular app using PyQt5 system tray.
-
 Project structure:
 - models.py: Pause, PauseManager, StudySession
 - db.py: SessionDatabase
@@ -30,7 +17,9 @@ import os
 import fcntl
 from pathlib import Path
 from dotenv import load_dotenv
-from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QWidget, QVBoxLayout, QPushButton, QLabel
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (QApplication, QSystemTrayIcon, QWidget,
+                             QVBoxLayout, QPushButton, QLabel)
 
 from tray import StudySessionTray
 from logger import setup_logger
@@ -38,15 +27,21 @@ from logger import setup_logger
 logger = setup_logger('main')
 
 
+# Held for the process lifetime; module-global so GC can't close the
+# descriptor and silently release the lock
+_lock_file = None
+
+
 def main():
     """Main entry point: load env, start Qt app, show tray"""
-    # Single-instance lock (Linux): prevents multiple tray icons overlapping
+    global _lock_file
+    # Single-instance lock (Linux): prevents multiple tray icons
+    # overlapping. flock on an empty file is released automatically when
+    # the process exits (cleanly or not), so no PID bookkeeping is needed.
     lock_path = "/tmp/study_session_tray.lock"
     try:
-        lock_file = open(lock_path, 'w')
-        fcntl.lockf(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
-        lock_file.write(str(os.getpid()))
-        lock_file.flush()
+        _lock_file = open(lock_path, 'w')
+        fcntl.flock(_lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
     except Exception:
         logger.warning("Another Study Session Manager instance appears to be running. Exiting.")
         return 1
@@ -62,34 +57,43 @@ def main():
     else:
         logger.info("N8N_BASE_URL not set (using local-only mode)")
 
-    # Ensure system tray is available
-    tray = None
-    if not QSystemTrayIcon.isSystemTrayAvailable():
+    # Always create the tray: Qt attaches the icon automatically when a
+    # tray becomes available, so probing isSystemTrayAvailable() up front
+    # both blocks startup and can race DE tray registration. A deferred
+    # check opens the fallback window only if the icon never appeared.
+    tray = StudySessionTray(app)
+    tray.show()
+
+    class FallbackWindow(QWidget):
+        def __init__(self, tray_ref):
+            super().__init__()
+            self.tray_ref = tray_ref
+            self.setWindowTitle("Study Session Manager (Fallback)")
+            layout = QVBoxLayout()
+            self.info = QLabel("System tray unavailable. Use this window to access the menu.")
+            layout.addWidget(self.info)
+            btn = QPushButton("Open Menu")
+            btn.clicked.connect(self.open_menu)
+            layout.addWidget(btn)
+            self.setLayout(layout)
+        def open_menu(self):
+            if self.tray_ref and self.tray_ref.menu:
+                # Show menu centered over the window
+                self.tray_ref.menu.exec_(self.mapToGlobal(self.rect().center()))
+
+    def _show_fallback_if_needed():
+        # isVisible() only reflects the requested property (true right
+        # after show()); ask whether a tray implementation actually exists.
+        # By now the DE has had time to register one, so a negative answer
+        # means there really is no tray to attach to.
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            return
         logger.warning("System tray not available on this desktop environment. Launching fallback window.")
-        # Fallback window to access the same menu actions
-        tray = StudySessionTray(app)
-        class FallbackWindow(QWidget):
-            def __init__(self, tray_ref):
-                super().__init__()
-                self.tray_ref = tray_ref
-                self.setWindowTitle("Study Session Manager (Fallback)")
-                layout = QVBoxLayout()
-                self.info = QLabel("System tray unavailable. Use this window to access the menu.")
-                layout.addWidget(self.info)
-                btn = QPushButton("Open Menu")
-                btn.clicked.connect(self.open_menu)
-                layout.addWidget(btn)
-                self.setLayout(layout)
-            def open_menu(self):
-                if self.tray_ref and self.tray_ref.menu:
-                    # Show menu centered over the window
-                    self.tray_ref.menu.exec_(self.mapToGlobal(self.rect().center()))
-        fallback = FallbackWindow(tray)
-        fallback.show()
-    else:
-        tray = StudySessionTray(app)
-        tray.show()
-        tray.setVisible(True)
+        # Kept on an attribute so the window isn't garbage collected
+        main._fallback = FallbackWindow(tray)
+        main._fallback.show()
+
+    QTimer.singleShot(3000, _show_fallback_if_needed)
 
     logger.info("Study Session Manager started")
     logger.info("Local storage: ~/.local/share/study-session/")
@@ -1,36 +1,76 @@
 #!/usr/bin/env python3
-from datetime import datetime
-from PyQt5.QtWidgets import QSystemTrayIcon, QMenu, QAction, QMessageBox
+import time
+from contextlib import contextmanager
+from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QAction
 from PyQt5.QtGui import QIcon, QCursor
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QTimer, QThreadPool, QRunnable
 
 from models import StudySession
-from api import SessionAPIManager
-from dialogs import InputDialog, SelectDialog, EnvironmentDialog, SettingsDialog
 from logger import setup_logger
 
+# api (aiohttp) and dialogs (widget subclasses) are imported lazily in
+# the handlers that need them so the tray icon paints before that code
+# is even parsed
+
 logger = setup_logger('tray')
 
+_ICON_CACHE = None
+
+
+def _get_clock_icon():
+    """Resolve the tray icon once; theme index walks are not repeated."""
+    global _ICON_CACHE
+    if _ICON_CACHE is None:
+        # Local svg first: no XDG theme-index parse on the startup path
+        icon = QIcon("clock.svg")
+        if icon.isNull():
+            icon = QIcon.fromTheme("clock")
+        if icon.isNull():
+            icon = QIcon.fromTheme("preferences-system-time")
+        _ICON_CACHE = icon
+    return _ICON_CACHE
+
+
+class _DbTask(QRunnable):
+    """Runs a blocking SessionDatabase call on a pool thread.
+
+    Keeps the commit fsync off the Qt event loop; SessionDatabase
+    serializes concurrent callers internally.
+    """
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+
+    def run(self):
+        try:
+            self._fn(*self._args, **self._kwargs)
+        except Exception:
+            logger.exception("Background DB task failed")
+
+
 class StudySessionTray(QSystemTrayIcon):
     def __init__(self, app, parent=None):
         super().__init__(parent)
         self.app = app
+        self._init_state()
+        self._init_ui()
+
+    def _init_state(self):
+        """Session/domain state; no widgets, safe without a tray."""
         self.session = StudySession()
-        self.api = SessionAPIManager()
-        self.api.status_changed.connect(self.on_status_changed)
+        self._api = None
         self.session.status_changed.connect(self.on_session_status_changed)
         # Environment context (set via future dialog; defaults empty)
         self.current_location = ""
         self.current_equipment = ""
         self.last_profile = ""  # Track last used profile
-        # Load last profile from persistent storage
-        self._load_last_profile()
-        # Clock icon with robust fallbacks: theme -> local svg -> generic
-        icon = QIcon.fromTheme("clock")
-        if icon.isNull():
-            local_icon = QIcon("clock.svg")
-            icon = local_icon if not local_icon.isNull() else QIcon.fromTheme("preferences-system-time")
-        self.setIcon(icon)
+
+    def _init_ui(self):
+        """Icon, menu, and timers. The fallback window reuses the same
+        instance, so this runs exactly once either way."""
+        self.setIcon(_get_clock_icon())
         self.setToolTip("Study Session Manager\nRight-click for menu")
         self.menu = None
         self.status_action = None
@@ -38,12 +78,40 @@ class StudySessionTray(QSystemTrayIcon):
         self.pause_action = None
         self.continue_action = None
         self.end_action = None
+        # Last applied (enabled..., visible...) tuple; lets the state
+        # refresh bail out or apply only the entries that changed
+        self._last_action_state = None
         self.setup_menu()
         self.activated.connect(self.on_tray_activated)
-        self.update_timer = QTimer(); self.update_timer.timeout.connect(self.update_menu_status); self.update_timer.start(1000)
+        # Ticks only while the menu is visible (started from aboutToShow);
+        # no idle wakeups when nobody is looking
+        self.update_timer = QTimer(); self.update_timer.setInterval(1000)
+        self.update_timer.timeout.connect(self.update_menu_status)
+        # Last rendered minute and (running, paused) key; the 1 Hz tick
+        # early-outs until one changes since the label has minute resolution
+        self._last_status_minute = -1
+        self._last_status_key = None
+        # Last string actually written to the status row; shared guard for
+        # the tick and the two status signals
+        self._last_status_text = None
         # Update profile display after menu is set up
         self.update_profile_display()
-    
+        # Load the last profile on the first event-loop turn, after the
+        # tray has painted; this is what first constructs the API manager
+        QTimer.singleShot(0, self._deferred_init)
+
+    @property
+    def api(self):
+        if self._api is None:
+            from api import SessionAPIManager
+            self._api = SessionAPIManager()
+            self._api.status_changed.connect(self.on_status_changed)
+        return self._api
+
+    def _deferred_init(self):
+        self._load_last_profile()
+        self.update_profile_display()
+
     def on_tray_activated(self, reason):
         cursor_pos = QCursor.pos()
         if reason == QSystemTrayIcon.Context:
@@ -56,35 +124,68 @@ class StudySessionTray(QSystemTrayIcon):
     
     def setup_menu(self):
         self.menu = QMenu()
-        self.status_action = QAction("📊 Idle"); self.status_action.setEnabled(False)
+        # (attr, text, slot) rows; None is a separator. References are
+        # kept both as attributes and in _actions so nothing is GC'd.
+        spec = (
+            ('status_action', "📊 Idle", None),
+            ('profile_action', "Profile: None", self.change_profile),
+            None,
+            # Place Sync near the top for visibility
+            ('sync_action', "🔄 Sync Now", self.sync_now),
+            ('stats_action', "📈 Stats", self.show_stats),
+            ('change_profile_action', "📋 Change Profile…", self.change_profile_during_session),
+            ('start_action', "▶️  Start Session", self.start_session),
+            ('pause_action', "⏸️  Pause Session", self.pause_session),
+            ('continue_action', "▶️  Continue Session", self.continue_session),
+            ('end_action', "⏹️  End Session", self.end_session),
+            None,
+            ('settings_action', "⚙️  Settings…", self.open_settings),
+            ('quit_action', "❌ Quit", self.quit_app),
+        )
+        self._actions = {}
+        for entry in spec:
+            if entry is None:
+                self.menu.addSeparator()
+                continue
+            attr, text, slot = entry
+            action = QAction(text)
+            if slot is not None:
+                action.triggered.connect(slot)
+            self.menu.addAction(action)
+            self._actions[attr] = action
+            setattr(self, attr, action)
+        # Status row is informational: disabled, bold
+        self.status_action.setEnabled(False)
         status_font = self.status_action.font(); status_font.setBold(True); self.status_action.setFont(status_font)
-        self.menu.addAction(self.status_action)
-        self.profile_action = QAction("Profile: None"); self.profile_action.triggered.connect(self.change_profile)
-        self.menu.addAction(self.profile_action)
-        self.menu.addSeparator()
-        # Place Sync near the top for visibility
-        self.sync_action = QAction("🔄 Sync Now"); self.sync_action.triggered.connect(self.sync_now); self.menu.addAction(self.sync_action)
-        # Keep references to prevent GC removing actions
-        self.change_profile_action = QAction("📋 Change Profile…"); self.change_profile_action.triggered.connect(self.change_profile_during_session); self.menu.addAction(self.change_profile_action)
-        self.start_action = QAction("▶️  Start Session"); self.start_action.triggered.connect(self.start_session); self.menu.addAction(self.start_action)
-        self.pause_action = QAction("⏸️  Pause Session"); self.pause_action.triggered.connect(self.pause_session); self.menu.addAction(self.pause_action)
-        self.continue_action = QAction("▶️  Continue Session"); self.continue_action.triggered.connect(self.continue_session); self.menu.addAction(self.continue_action)
-        self.end_action = QAction("⏹️  End Session"); self.end_action.triggered.connect(self.end_session); self.menu.addAction(self.end_action)
-        self.menu.addSeparator()
-        self.settings_action = QAction("⚙️  Settings…"); self.settings_action.triggered.connect(self.open_settings); self.menu.addAction(self.settings_action)
-        self.quit_action = QAction("❌ Quit"); self.quit_action.triggered.connect(self.quit_app); self.menu.addAction(self.quit_action)
         # Attach as tray context menu for KDE
         self.setContextMenu(self.menu)
+        # Drive the elapsed-time tick from menu visibility
+        self.menu.aboutToShow.connect(self._on_menu_about_to_show)
+        self.menu.aboutToHide.connect(self.update_timer.stop)
         # Initialize action states and visibility
         self.update_menu_action_states()
-        running = self.session.is_running
-        if self.change_profile_action:
-            self.change_profile_action.setVisible(running)
-        if self.sync_action:
-            self.sync_action.setVisible(not running)
-        # Ensure context menu is non-empty and visible
-        self.setToolTip("Study Session Manager")
     
+    @contextmanager
+    def _frozen_menu(self):
+        """Collapse several QAction mutations into one menu relayout.
+
+        Each setText/setEnabled/setVisible otherwise invalidates the menu
+        individually; freezing updates batches them into a single repaint.
+        """
+        self.menu.setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            self.menu.setUpdatesEnabled(True)
+            self.menu.update()
+
+    def _on_menu_about_to_show(self):
+        # Refresh immediately so the first paint is current, then tick.
+        # Action states otherwise update from the status signals.
+        self.update_menu_status()
+        self.update_menu_action_states()
+        self.update_timer.start()
+
     def start_session(self):
         if self.session.is_running:
             self.show_notification("⚠️  Session Active", "End current session first", 3000); return
@@ -93,7 +194,8 @@ class StudySessionTray(QSystemTrayIcon):
             prof = self.api.db.get_profile(self.last_profile)
             if prof:
                 self.current_location = prof.get('location', '')
-                self.current_equipment = prof.get('equipment', '')
+                # Profiles store equipment as a list; sessions keep a display string
+                self.current_equipment = ", ".join(prof.get('equipment') or [])
             else:
                 # Profile was deleted, clear it
                 self.last_profile = ""
@@ -108,6 +210,7 @@ class StudySessionTray(QSystemTrayIcon):
     def pause_session(self):
         if not self.session.is_running:
             self.show_notification("❌ No Active Session", "Start a session first", 2000); return
+        from dialogs import InputDialog
         dialog = InputDialog(None, "Pause Session", "Why are you pausing?", multiline=False)
         if dialog.exec_() == dialog.Accepted:
             reason = dialog.get_text()
@@ -131,74 +234,143 @@ class StudySessionTray(QSystemTrayIcon):
     def end_session(self):
         if not self.session.is_running:
             self.show_notification("❌ No Active Session", "Start a session first", 2000); return
+        from dialogs import InputDialog
         dialog = InputDialog(None, "End Session", "Session summary (optional):")
         if dialog.exec_() == dialog.Accepted:
             notes = dialog.get_text()
-            summary = self.session.end()
-            if summary:
-                # Enrich summary with timestamps for CSV
-                summary['started_at'] = self.session.start_time.isoformat() if self.session.start_time else None
-                summary['ended_at'] = self.session.end_time.isoformat() if self.session.end_time else None
-                # Save to CSV (sessions.csv and pauses.csv)
-                self.api.db.save_session(self.session, notes, location=self.current_location, equipment=self.current_equipment)
-                params = { 'notes': notes, 'active_time': summary['active_time'], 'total_pause': summary['total_pause'], 'pause_count': summary['pause_count'] }
-                # Log end locally only; syncing happens via manual "Sync Now"
-                self.api.db.log_event(self.session.id, 'end', params)
-                duration_str = f"{int(summary['active_time'] / 60)} min"
+            # Snapshot the rows on the GUI thread so the reset() below
+            # can't race the background write; the worker gets plain data
+            rows = self.api.db.build_session_rows(
+                self.session, notes,
+                location=self.current_location, equipment=self.current_equipment)
+            if rows:
+                session_row, pause_rows = rows
+                params = { 'notes': notes, 'active_time': session_row['active_time_seconds'], 'total_pause': session_row['total_pause_duration_seconds'], 'pause_count': session_row['pause_count'] }
+                # Buffer the end event first so the save folds it into
+                # the same transaction as the session row (one commit)
+                self.api.db.log_event(session_row['session_id'], 'end', params)
+                # Persist off the GUI thread so the commit doesn't block the menu
+                QThreadPool.globalInstance().start(_DbTask(
+                    self.api.db.save_session_rows, session_row, pause_rows))
+                duration_str = f"{int(session_row['active_time_seconds'] / 60)} min"
                 self.show_notification("✅ Session Ended", f"Logged: {duration_str}", 3000)
-                self.session = StudySession(); self.session.status_changed.connect(self.on_session_status_changed)
+                with self._frozen_menu():
+                    # Reuse the QObject and its signal connection
+                    self.session.reset()
+                    self.update_menu_action_states()
     
+    def show_stats(self):
+        """Show lifetime totals for completed sessions."""
+        count, total_seconds, pause_count = self.api.db.fetch_stats_summary()
+        hours, minutes = divmod(total_seconds // 60, 60)
+        self.show_notification(
+            "📈 Session Stats",
+            f"{count} sessions · {hours}h {minutes:02d}m studied · {pause_count} pauses",
+            4000)
+
     def sync_now(self):
         # Manually trigger sync to n8n endpoints as configured in .env
-        print("[Tray] Sync Now clicked — starting manual sync...")
-        self.api.run_async(self.api.sync_unsynced())
+        logger.debug("Sync Now clicked — starting manual sync")
+        self.api.trigger_sync()
     
+    def _set_status_text(self, text):
+        # setText relayouts the menu even for an identical string, so
+        # every status writer funnels through this guard
+        if self.status_action and text != self._last_status_text:
+            self.status_action.setText(text)
+            self._last_status_text = text
+
     def on_status_changed(self, message):
-        if self.status_action:
-            self.status_action.setText(message)
-    
+        self._set_status_text(message)
+        self.update_menu_action_states()
+
     def on_session_status_changed(self, message):
-        if self.status_action:
-            self.status_action.setText(message)
+        self._set_status_text(message)
+        self.update_menu_action_states()
     
+    # Status templates; %-formatting of a single int is the cheapest
+    # path in CPython and only runs when the minute advances
+    _STATUS_PAUSED_FMT = "⏸️  Paused (%dm)"
+    _STATUS_RUNNING_FMT = "▶️  Running (%dm)"
+    _STATUS_IDLE = "📊 Idle"
+
+    def _apply_idle(self, minutes):
+        self._set_status_text(self._STATUS_IDLE)
+
+    def _apply_running(self, minutes):
+        self._set_status_text(self._STATUS_RUNNING_FMT % minutes)
+
+    def _apply_paused(self, minutes):
+        self._set_status_text(self._STATUS_PAUSED_FMT % minutes)
+
+    # Dispatch on the (running, paused) key; each handler renders just its
+    # own state, so the tick body carries no if-cascade
+    _STATUS_HANDLERS = {
+        (False, None): _apply_idle,
+        (True, False): _apply_running,
+        (True, True): _apply_paused,
+    }
+
     def update_menu_status(self):
         if self.session.is_running and self.session.start_time:
-            elapsed = datetime.now() - self.session.start_time
-            minutes = int(elapsed.total_seconds() / 60)
-            active_pauses = self.session.pause_manager.get_active_pauses()
-            status = f"⏸️  Paused ({minutes}m)" if active_pauses else f"▶️  Running ({minutes}m)"
-            if self.status_action:
-                self.status_action.setText(status)
+            # Monotonic delta: no datetime/timedelta allocation per tick
+            # and immune to wall-clock jumps
+            minutes = int(time.monotonic() - self.session._start_monotonic) // 60
+            key = (True, self.session.pause_manager.has_active_pauses())
         else:
-            if self.status_action:
-                self.status_action.setText("📊 Idle")
-        # Keep action enabled states in sync
-        self.update_menu_action_states()
+            minutes = -1
+            key = (False, None)
+        if minutes == self._last_status_minute and key == self._last_status_key:
+            return
+        self._last_status_minute = minutes
+        self._last_status_key = key
+        self._STATUS_HANDLERS[key](self, minutes)
+
+    # Desired action states as predicates over (running, paused)
+    _ENABLED_RULES = (
+        ('start_action', lambda running, paused: not running),
+        ('pause_action', lambda running, paused: running and not paused),
+        ('continue_action', lambda running, paused: running and paused),
+        ('end_action', lambda running, paused: running),
+    )
+    # Sync vs Change Profile visibility swaps with the session state
+    _VISIBLE_RULES = (
+        ('change_profile_action', lambda running, paused: running),
+        ('sync_action', lambda running, paused: not running),
+    )
 
     def update_menu_action_states(self):
         running = self.session.is_running
-        paused = False
-        if running:
-            paused = bool(self.session.pause_manager.get_active_pauses())
-        if self.start_action:
-            self.start_action.setEnabled(not running)
-        if self.pause_action:
-            self.pause_action.setEnabled(running and not paused)
-        if self.continue_action:
-            self.continue_action.setEnabled(running and paused)
-        if self.end_action:
-            self.end_action.setEnabled(running)
-        # Toggle visibility of Sync vs Change Profile
-        if hasattr(self, 'change_profile_action') and self.change_profile_action:
-            self.change_profile_action.setVisible(running)
-        if hasattr(self, 'sync_action') and self.sync_action:
-            self.sync_action.setVisible(not running)
+        paused = running and self.session.pause_manager.has_active_pauses()
+        # setEnabled/setVisible emit signals and can relayout the menu even
+        # for no-op values, so diff against the last applied tuple and touch
+        # only the entries that changed (zero Qt calls in steady state)
+        state = tuple(rule(running, paused)
+                      for _, rule in self._ENABLED_RULES + self._VISIBLE_RULES)
+        last = self._last_action_state
+        if state == last:
+            return
+        if last is None:
+            last = (None,) * len(state)
+        actions = self._actions
+        offset = len(self._ENABLED_RULES)
+        for i, (attr, _) in enumerate(self._ENABLED_RULES):
+            if state[i] != last[i]:
+                actions[attr].setEnabled(state[i])
+        for j, (attr, _) in enumerate(self._VISIBLE_RULES):
+            if state[offset + j] != last[offset + j]:
+                actions[attr].setVisible(state[offset + j])
+        self._last_action_state = state
     
     def show_notification(self, title, message, duration=2000):
-        self.showMessage(title, message, QSystemTrayIcon.Information, duration)
+        # Posted on the next event-loop turn: showMessage can block while
+        # the DE builds the balloon, and the click handler shouldn't wait
+        QTimer.singleShot(0, lambda: self.showMessage(
+            title, message, QSystemTrayIcon.Information, duration))
     
     def change_profile(self):
         """Allow user to select/edit a profile from the tray menu"""
+        from dialogs import EnvironmentDialog
         env_dialog = EnvironmentDialog(None, db=self.api.db, title="Select/Edit Profile", label="Choose or modify a profile")
         if env_dialog.exec_() != env_dialog.Accepted:
             return
@@ -222,13 +394,13 @@ class StudySessionTray(QSystemTrayIcon):
     
     def _load_last_profile(self):
         """Load last used profile from persistent storage"""
-        last_profile = self.api.db.get_setting('last_profile', '')
+        last_profile, prof = self.api.db.get_setting_and_profile('last_profile', '')
         if last_profile:
-            prof = self.api.db.get_profile(last_profile)
             if prof:
                 self.last_profile = last_profile
                 self.current_location = prof.get('location', '')
-                self.current_equipment = prof.get('equipment', '')
+                # Profiles store equipment as a list; sessions keep a display string
+                self.current_equipment = ", ".join(prof.get('equipment') or [])
                 logger.info(f"Loaded last profile: {last_profile}")
             else:
                 logger.info(f"Last profile '{last_profile}' not found, cleared")
@@ -239,7 +411,15 @@ class StudySessionTray(QSystemTrayIcon):
         logger.info(f"Saved last profile: {self.last_profile or '(none)'}")
     
     def quit_app(self):
-        self.hide(); self.app.quit()
+        # Stop queued ticks, let the DE unregister the icon before the
+        # loop dies (lingering-icon fix), and drain pending DB writes
+        self.update_timer.stop()
+        self.hide()
+        QApplication.processEvents()
+        self.setContextMenu(None)
+        QThreadPool.globalInstance().waitForDone(3000)
+        self.deleteLater()
+        self.app.quit()
 
     def change_profile_during_session(self):
         """Change profile during an active session - splits the session"""
@@ -254,6 +434,7 @@ class StudySessionTray(QSystemTrayIcon):
             return
         
         profile_names = [p['name'] for p in profiles]
+        from dialogs import SelectDialog
         dialog = SelectDialog(None, "Change Profile", "Select new profile (will split session):", profile_names)
         if dialog.exec_() != dialog.Accepted:
             return
@@ -267,8 +448,9 @@ class StudySessionTray(QSystemTrayIcon):
             return
         
         new_loc = prof.get('location', '')
-        new_eq = prof.get('equipment', '')
-        
+        new_eq = ", ".join(prof.get('equipment') or [])
+
+        from PyQt5.QtWidgets import QMessageBox
         reply = QMessageBox.question(None,
                                      "Split Session?",
                                      f"Changing to profile '{selected}' will end the current session and start a new one. Continue?",
@@ -279,32 +461,42 @@ class StudySessionTray(QSystemTrayIcon):
         
         # Finish current session with an auto note and current environment
         old_id = self.session.id
-        # Close any active pause before ending
-        if self.session.pause_manager.get_active_pauses():
+        # The end/reset/start sequence below touches the status row, the
+        # profile row and every action's state; batch it into one repaint
+        with self._frozen_menu():
+            # Close any active pause before ending
+            if self.session.pause_manager.has_active_pauses():
+                try:
+                    self.session.resume()
+                except Exception:
+                    pass
+            auto_note = f"continuing session {old_id}; profile changed to {selected}"
+            # End and snapshot the old session on the GUI thread so the
+            # reset()/start() below can't race the background write
+            rows = None
             try:
-                self.session.resume()
+                rows = self.api.db.build_session_rows(
+                    self.session, auto_note,
+                    location=self.current_location, equipment=self.current_equipment)
             except Exception:
-                pass
-        auto_note = f"continuing session {old_id}; profile changed to {selected}"
-        # End and persist old session with old env
-        try:
-            self.session.end()
-        except Exception:
-            pass
-        self.api.db.save_session(self.session, auto_note, location=self.current_location, equipment=self.current_equipment)
-        
-        # Start a fresh session with new profile
-        self.last_profile = selected
-        self.current_location = new_loc
-        self.current_equipment = new_eq
-        self._save_last_profile()
-        self.update_profile_display()
-        self.session = StudySession(); self.session.status_changed.connect(self.on_session_status_changed)
-        self.session.start()
-        self.api.db.log_event(self.session.id, 'start', {})
+                logger.exception("Failed to snapshot session %s", old_id)
+            if rows:
+                QThreadPool.globalInstance().start(_DbTask(
+                    self.api.db.save_session_rows, *rows))
+
+            # Start a fresh session with new profile
+            self.last_profile = selected
+            self.current_location = new_loc
+            self.current_equipment = new_eq
+            self._save_last_profile()
+            self.update_profile_display()
+            self.session.reset()
+            self.session.start()
+            self.api.db.log_event(self.session.id, 'start', {})
         self.show_notification("📋 Profile Changed", f"New session started with {selected}", 3000)
 
     def open_settings(self):
+        from dialogs import SettingsDialog
         dlg = SettingsDialog(None, db=self.api.db, title="Settings")
         if dlg.exec_() == dlg.Accepted:
             self.show_notification("⚙️  Settings Saved", "Catalogs updated", 2000)
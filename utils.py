@@ -1,17 +1,75 @@
 #!/usr/bin/env python3
-import socket
+import asyncio
 import time
-from typing import Tuple
+from typing import Optional, Tuple
 
-def check_connectivity(host: str = "8.8.8.8", port: int = 53, timeout: float = 1.0) -> Tuple[bool, float]:
+# Probe targets raced in parallel; any answering proves connectivity.
+# Public DNS resolvers on 53/tcp are reachable from almost any network.
+_PROBE_TARGETS = (("8.8.8.8", 53), ("1.1.1.1", 53))
+
+# Last probe result shared across callers: (monotonic timestamp, reachable,
+# latency_ms). Dialogs re-open often during a session; within the TTL they
+# reuse the cached state instead of re-probing the network.
+_CONN_CACHE_TTL = 30.0
+_conn_cache = None
+
+
+def cached_connectivity():
+    """Return the cached (reachable, latency_ms) if still fresh, else None.
+
+    Lets UI callers read the last-known state instantly and skip spawning
+    a probe thread entirely while the TTL holds."""
+    if _conn_cache is not None and time.monotonic() - _conn_cache[0] < _CONN_CACHE_TTL:
+        return _conn_cache[1], _conn_cache[2]
+    return None
+
+
+async def check_any(targets=_PROBE_TARGETS, timeout: float = 1.0
+                    ) -> Tuple[bool, float, Optional[str]]:
+    """Race TCP connects to several targets; the first success wins.
+
+    Returns (reachable, latency_ms, winner_host). Latency is the fastest
+    target's, not the sum, and losers are cancelled as soon as one answers.
+    """
+    start = time.monotonic()
+
+    async def probe(host, port):
+        _, writer = await asyncio.open_connection(host, port)
+        writer.close()
+        return host
+
+    pending = {asyncio.ensure_future(probe(h, p)) for h, p in targets}
+    try:
+        while pending:
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    latency = (time.monotonic() - start) * 1000.0
+                    return True, latency, task.result()
+        return False, -1.0, None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def check_connectivity(timeout: float = 1.0) -> Tuple[bool, float]:
     """
-    Try TCP connect to host:port with a timeout.
+    Probe the network by racing TCP connects to a few well-known hosts.
     Returns (reachable, latency_ms). latency_ms is -1 if not reachable.
+    Results are cached for a short TTL and shared across callers.
+    Blocks up to `timeout`; call it off the GUI thread.
     """
-    start = time.time()
+    global _conn_cache
+    now = time.monotonic()
+    if _conn_cache is not None and now - _conn_cache[0] < _CONN_CACHE_TTL:
+        return _conn_cache[1], _conn_cache[2]
     try:
-        with socket.create_connection((host, port), timeout=timeout):
-            latency = (time.time() - start) * 1000.0
-            return True, latency
+        reachable, latency, _ = asyncio.run(check_any(timeout=timeout))
     except Exception:
-        return False, -1.0
+        reachable, latency = False, -1.0
+    _conn_cache = (time.monotonic(), reachable, latency)
+    return reachable, latency